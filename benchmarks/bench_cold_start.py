@@ -0,0 +1,117 @@
+"""
+Cold-start benchmark: process start → first successful sync, in a fresh interpreter
+Runs the app's own --profile-startup mode against the local stand-ins, once
+as shipped (lazy imports) and once with the heavy modules imported up front
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 5] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import harness
+
+# Modules the app used to import at load time, and only needs for OAuth or the tray
+HEAVY_MODULES = ("requests", "pystray", "PIL.Image", "PIL.ImageDraw", "webbrowser", "http.server")
+
+# Runs in the child: load the app from source, point it at the stand-ins, run main()
+CHILD = r"""
+import importlib.machinery, importlib.util, json, sys
+app_path, workdir, goxlr_url, eager = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4] == "1"
+heavy = %r
+if eager:
+    for module in heavy:
+        __import__(module)
+
+sys.argv = [app_path, "--profile-startup"]
+loader = importlib.machinery.SourceFileLoader("goxlr_discord_sync", app_path)
+app = importlib.util.module_from_spec(importlib.util.spec_from_loader("goxlr_discord_sync", loader))
+sys.modules["goxlr_discord_sync"] = app
+loader.exec_module(app)
+
+app.CLIENT_ID_FILE = workdir + "/client_id.txt"
+app.SECRET_FILE = workdir + "/client_secret.txt"
+app.TOKEN_FILE = workdir + "/discord_token.json"
+app.CONFIG_FILE = workdir + "/config.json"
+app.STARTUP_PROFILE_FILE = workdir + "/startup_profile.json"
+app.GOXLR_WEBSOCKET_URL = goxlr_url
+
+# Note what was loaded by the time of the first sync
+report = app.report_startup
+def report_startup():
+    result = report()
+    with open(workdir + "/loaded.json", "w") as f:
+        json.dump([module for module in heavy if module in sys.modules], f)
+    return result
+app.report_startup = report_startup
+
+app.main()
+""" % (HEAVY_MODULES,)
+
+async def run_child(goxlr, discord, eager):
+    """Start the app in a new process, return its startup profile"""
+    workdir = harness.logon_workdir("bench-cold-")
+
+    env = dict(os.environ, XDG_RUNTIME_DIR=discord.runtime_dir, PYSTRAY_BACKEND="dummy")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", CHILD, harness.APP_PATH, workdir, goxlr.url, "1" if eager else "0",
+        env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    _, stderr = await asyncio.wait_for(process.communicate(), 90)
+    if process.returncode != 0:
+        raise RuntimeError(f"app exited with {process.returncode}: {stderr.decode()[-2000:]}")
+
+    with open(os.path.join(workdir, "startup_profile.json")) as f:
+        profile = json.load(f)
+    with open(os.path.join(workdir, "loaded.json")) as f:
+        profile["heavy_modules_loaded"] = json.load(f)
+    return profile
+
+def summarize(profiles):
+    milestones = sorted({name for p in profiles for name in p["milestones"]})
+    return {
+        "process_start_to_first_sync_ms": harness.percentiles(
+            [p["process_start_to_first_sync"] for p in profiles if "process_start_to_first_sync" in p]),
+        "imports_ms": harness.percentiles([p["milestones"]["imports"] for p in profiles]),
+        "milestones_ms": {
+            name: harness.percentiles([p["milestones"][name] for p in profiles if name in p["milestones"]])
+            for name in milestones
+        },
+        "heavy_modules_loaded_at_first_sync": profiles[-1]["heavy_modules_loaded"],
+    }
+
+async def run(args):
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    await goxlr.start()
+    await discord.start()
+    try:
+        results = {}
+        for name, eager in (("lazy", False), ("eager", True)):
+            # One warm-up, so both variants read the same modules from the OS cache
+            await run_child(goxlr, discord, eager)
+            results[name] = summarize([await run_child(goxlr, discord, eager) for _ in range(args.runs)])
+    finally:
+        await goxlr.stop()
+        await discord.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "cold_start",
+        "environment": harness.environment(),
+        "params": {"runs": args.runs},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Discord IPC benchmark: the built-in client against pypresence's AioClient
+Both talk to the local fake Discord, which takes --delay seconds per command:
+connect + authenticate, N mute writes one at a time, and (built-in client
+only, pypresence reads replies in order) N writes pipelined with voice events
+arriving on the same connection. Also times importing each client.
+
+Usage:
+    python benchmarks/bench_discord_ipc.py [--writes 200] [--delay 0.002] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import harness
+
+async def native_client(app):
+    client = app.DiscordIPC(100000000000000000, app.discord_ipc_paths()[0])
+    await client.connect()
+    await client.authenticate("bench-token")
+    return client
+
+async def pypresence_client():
+    from pypresence import AioClient
+    client = AioClient("100000000000000000")
+    await client.start()
+    await client.authenticate("bench-token")
+    return client
+
+def close_pypresence(client):
+    try:
+        client.close()
+    except Exception:
+        pass  # AioClient.close() also tries to close the running loop
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+async def writes_one_at_a_time(client, count):
+    latencies = []
+    for i in range(count):
+        _, elapsed = await timed(client.set_voice_settings(mute=bool(i % 2)))
+        latencies.append(elapsed)
+    return latencies
+
+async def run_native(app, args):
+    client, connect = await timed(native_client(app))
+    try:
+        serial = await writes_one_at_a_time(client, args.writes)
+
+        await client.subscribe("VOICE_SETTINGS_UPDATE")
+        events = 0
+
+        async def count_events():
+            nonlocal events
+            while True:
+                await client.next_event()
+                events += 1
+
+        counter = asyncio.create_task(count_events())
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(
+            timed(client.set_voice_settings(mute=bool(i % 2))) for i in range(args.writes)))
+        pipelined = time.perf_counter() - start
+        await asyncio.sleep(0.1)  # events for the last writes
+        counter.cancel()
+    finally:
+        client.close()
+
+    return {
+        "connect_ms": connect * 1000,
+        "one_at_a_time": {"seconds": sum(serial), "write_ms": harness.percentiles(serial)},
+        "pipelined": {"seconds": pipelined,
+                      "write_ms": harness.percentiles([elapsed for _, elapsed in latencies]),
+                      "events_received": events},
+    }
+
+async def run_pypresence(args):
+    client, connect = await timed(pypresence_client())
+    try:
+        serial = await writes_one_at_a_time(client, args.writes)
+    finally:
+        close_pypresence(client)
+    return {
+        "connect_ms": connect * 1000,
+        "one_at_a_time": {"seconds": sum(serial), "write_ms": harness.percentiles(serial)},
+    }
+
+def import_ms(statement, runs=5):
+    """Median time to run an import statement in a fresh interpreter"""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    samples = sorted(float(subprocess.run([sys.executable, "-c", code], capture_output=True,
+                                          text=True, check=True).stdout) for _ in range(runs))
+    return samples[len(samples) // 2] * 1000
+
+async def run(args):
+    app = harness.load_app()
+    discord = harness.FakeDiscord(delay=args.delay)
+    await discord.start()
+    harness.configure_app(app, "ws://127.0.0.1:1/unused", discord, "http://127.0.0.1:1/unused")
+    try:
+        results = {"builtin": await run_native(app, args)}
+        try:
+            import pypresence  # noqa: F401
+        except ImportError:
+            results["pypresence"] = "not installed"
+        else:
+            results["pypresence"] = await run_pypresence(args)
+    finally:
+        await discord.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.002, help="seconds the fake Discord takes per command")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    # The built-in client only needs modules the app loads anyway
+    results["import_ms"] = {"asyncio_json_struct": import_ms("import asyncio, json, struct")}
+    if isinstance(results["pypresence"], dict):
+        results["import_ms"]["plus_pypresence"] = import_ms("import asyncio, json, struct, pypresence")
+
+    harness.write_results({
+        "benchmark": "discord_ipc",
+        "environment": harness.environment(),
+        "params": {"writes": args.writes, "delay": args.delay},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+End-to-end benchmark: GoXLR cough patch → Discord mute (and back)
+Drives the real main_loop against local stand-ins and prints JSON results
+
+Usage:
+    python benchmarks/bench_e2e.py [--events 200] [--discord-delay 0.005]
+                                   [--output results.json]
+                                   [--baseline old.json --tolerance 0.25]
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+
+import harness
+
+COUGH_STATES = ("Unmuted", "MutedToAll")
+RATES = (10, 20, 50, 100, 200, 500, 1000)  # toggles per second
+
+async def wait_ready(app, discord, timeout=15):
+    """Wait until main_loop has synced the initial state with Discord"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not harness.app_synced(app):
+        if loop.time() > deadline:
+            raise RuntimeError("main_loop never synced the initial state")
+        await asyncio.sleep(0.01)
+
+async def measure_latency(goxlr, discord, events, gap):
+    """Toggle one press at a time and time each patch → Discord apply"""
+    samples = []
+    state = goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]["state"]
+
+    for _ in range(events):
+        state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+        applied = discord.wait_for_mute(state != "Unmuted")
+        sent = await goxlr.set_cough(state)
+        samples.append(await asyncio.wait_for(applied, 10) - sent)
+        await asyncio.sleep(gap)
+
+    return harness.percentiles(samples)
+
+async def measure_discord_to_goxlr(goxlr, discord, events, gap):
+    """Toggle mute in Discord's UI and time each event → GoXLR cough command.
+
+    Also counts Discord writes made meanwhile: the GoXLR echo of each change
+    must not bounce back to Discord.
+    """
+    samples = []
+    writes_before = len(discord.mute_writes)
+    mute = discord.voice["mute"]
+
+    for _ in range(events):
+        mute = not mute
+        state = "MutedToAll" if mute else "Unmuted"
+        applied = goxlr.wait_for_cough(state)
+        sent = await discord.user_set_mute(mute)
+        samples.append(await asyncio.wait_for(applied, 10) - sent)
+        await asyncio.sleep(gap)
+
+    result = harness.percentiles(samples)
+    result["echo_writes"] = len(discord.mute_writes) - writes_before
+    return result
+
+async def measure_rate(app, goxlr, discord, rate, duration, settle):
+    """Send toggles at a fixed rate, report whether every one reached Discord"""
+    loop = asyncio.get_running_loop()
+    count = max(10, int(rate * duration))
+    coalesced_before = app.sync_stats["coalesced"]
+    writes_before = len(discord.mute_writes)
+    state = goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]["state"]
+
+    start = loop.time()
+    for i in range(count):
+        # Absolute schedule, so a slow iteration doesn't lower the rate
+        delay = start + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+        await goxlr.set_cough(state)
+    last_sent = loop.time()
+    sent_for = last_sent - start
+
+    # Wait for Discord to reach the final state and go quiet (toggles
+    # alternate, so matching once isn't enough - a write may still be queued)
+    final_mute = state != "Unmuted"
+    quiet = max(0.05, 3 * discord.delay)
+    deadline = loop.time() + settle
+    converged = False
+    matched = None  # since when Discord holds the final state
+    while loop.time() < deadline:
+        now = loop.time()
+        last_write, last_mute = discord.mute_writes[-1] if discord.mute_writes else (0, None)
+        if discord.voice["mute"] != final_mute:
+            matched = None
+        elif matched is None:
+            # The write that got it there, rather than when this poll noticed
+            matched = max(last_sent, last_write) if last_mute == final_mute else now
+        if matched is not None and now - last_write > quiet:
+            converged = True
+            break
+        await asyncio.sleep(0.005)
+    # Last send → final state held; 0 if the last toggles needed no write
+    caught_up = max(0.0, matched - last_sent) if converged else None
+
+    writes = len(discord.mute_writes) - writes_before
+    coalesced = app.sync_stats["coalesced"] - coalesced_before
+    return {
+        "rate": rate,
+        "toggles": count,
+        "achieved_rate": count / sent_for if sent_for else None,
+        "discord_writes": writes,
+        "coalesced": coalesced,
+        "converged": converged,
+        "catch_up_ms": caught_up * 1000 if caught_up is not None else None,
+        # Sustained: every toggle reached Discord on its own, nothing had to be folded
+        "sustained": converged and coalesced == 0 and writes >= count,
+    }
+
+async def run(args):
+    app = harness.load_app()
+
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord(delay=args.discord_delay)
+    oauth = harness.FakeOAuth()
+
+    await goxlr.start()
+    await discord.start()
+    oauth.start()
+    harness.configure_app(app, goxlr.url, discord, oauth.url)
+    tray = None
+    if args.tray_delay:
+        # A slow tray backend, rendered by the app's own tray worker thread
+        tray = harness.SlowTray(args.tray_delay)
+        app.tray_icon = tray
+        threading.Thread(target=app.tray_worker, daemon=True).start()
+
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_ready(app, discord)
+            latency = await measure_latency(goxlr, discord, args.events, args.gap)
+            reverse = await measure_discord_to_goxlr(goxlr, discord, args.events, args.gap)
+
+            rates = []
+            for rate in RATES:
+                result = await measure_rate(app, goxlr, discord, rate, args.duration, args.settle)
+                rates.append(result)
+                if not result["converged"]:
+                    break
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+            app.app_running = False
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+
+    sustained = [r["rate"] for r in rates if r["sustained"]]
+    return {
+        "benchmark": "e2e",
+        "environment": harness.environment(),
+        "params": {
+            "events": args.events,
+            "gap": args.gap,
+            "discord_delay": args.discord_delay,
+            "duration": args.duration,
+            "tray_delay": args.tray_delay,
+        },
+        "event_to_mute_ms": latency,
+        "discord_to_goxlr_ms": reverse,
+        "throughput": {
+            "max_sustained_rate": max(sustained) if sustained else 0,
+            "rates": rates,
+        },
+        "oauth_requests": oauth.requests,
+        "tray_renders": tray.renders if tray else None,
+        "sync_stats": dict(app.sync_stats),
+        "stages": app.latency_report(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200, help="single presses to time")
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between timed presses")
+    parser.add_argument("--discord-delay", type=float, default=0.0, help="fake Discord reply delay (s)")
+    parser.add_argument("--tray-delay", type=float, default=0.0, help="fake tray backend delay per icon change (s)")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds per rate step")
+    parser.add_argument("--settle", type=float, default=5.0, help="max seconds to catch up per rate step")
+    parser.add_argument("--output", help="also write the JSON results here")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (fraction)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results(results, args.output)
+
+    if args.baseline:
+        failures = harness.check_regression(results, args.baseline, [
+            ("event_to_mute p95 (ms)", lambda r: r["event_to_mute_ms"]["p95"], False),
+            ("event_to_mute p99 (ms)", lambda r: r["event_to_mute_ms"]["p99"], False),
+            ("discord_to_goxlr p95 (ms)", lambda r: r["discord_to_goxlr_ms"]["p95"], False),
+            ("max sustained rate (/s)", lambda r: r["throughput"]["max_sustained_rate"], True),
+        ], args.tolerance)
+        if failures:
+            print("REGRESSION:", *failures, sep="\n  ", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
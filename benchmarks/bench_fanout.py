@@ -0,0 +1,125 @@
+"""
+Fan-out benchmark: one GoXLR press → every running Discord client
+Runs main_loop against two fake Discord clients (discord-ipc-0 and -1, like
+Stable next to Canary) and times each press until each client applied it.
+Then one client hangs: the other must keep its latency and keep being
+probed, and the hung one must be dropped and reconnected in the background.
+
+Usage:
+    python benchmarks/bench_fanout.py [--events 100] [--discord-delay 0.0]
+                                      [--hang-timeout 0.5] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import time
+
+import harness
+from bench_e2e import COUGH_STATES, wait_ready
+
+async def wait_until(predicate, timeout=15):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise RuntimeError("timed out")
+        await asyncio.sleep(0.01)
+
+async def measure(goxlr, clients, events, gap):
+    """Toggle one press at a time, time patch → apply on each client that should get it"""
+    samples = {name: [] for name in clients}
+    state = goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]["state"]
+
+    for _ in range(events):
+        state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+        applied = {name: discord.wait_for_mute(state != "Unmuted") for name, discord in clients.items()}
+        sent = await goxlr.set_cough(state)
+        for name, future in applied.items():
+            samples[name].append(await asyncio.wait_for(future, 10) - sent)
+        await asyncio.sleep(gap)
+
+    return {name: harness.percentiles(values) for name, values in samples.items()}
+
+async def run(args):
+    app = harness.load_app()
+    goxlr = harness.FakeGoXLR()
+    stable = harness.FakeDiscord(delay=args.discord_delay, pipe=0)
+    canary = harness.FakeDiscord(delay=args.discord_delay, runtime_dir=stable.runtime_dir, pipe=1)
+    oauth = harness.FakeOAuth()
+
+    await goxlr.start()
+    await stable.start()
+    await canary.start()
+    oauth.start()
+    harness.configure_app(app, goxlr.url, stable, oauth.url)
+    # The hung client must be noticed well within the benchmark
+    app.config["discord_command_timeout"] = args.hang_timeout
+    app.config["discord_probe_interval"] = args.hang_timeout
+    app.config["discord_probe_timeout"] = args.hang_timeout
+
+    results = {}
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_ready(app, stable)
+            await wait_until(lambda: len(app.discord_links) == 2)
+            results["both_healthy_ms"] = await measure(
+                goxlr, {"discord-ipc-0": stable, "discord-ipc-1": canary}, args.events, args.gap)
+
+            # Canary stops answering: writes to it time out, Stable must not notice
+            canary.delay = 3600
+            results["one_hung_ms"] = await measure(
+                goxlr, {"discord-ipc-0": stable}, args.events, args.gap)
+            await wait_until(lambda: "discord-ipc-1" not in app.status_report()["discord_clients"])
+            # From its last good reply until it was dropped
+            results["hung_detected_within_s"] = app.health_stats["last_detect"]
+            # While its reconnects hang, Stable is still probed on schedule
+            # and the tray says one client is out, not that Discord is
+            results["tray_one_hung"] = app.tray_state()
+            probes = app.health_stats["probes"]
+            await asyncio.sleep(4 * args.hang_timeout)
+            results["probes_while_hung_reconnects"] = app.health_stats["probes"] - probes
+
+            # Canary answers again: it is reconnected and caught up
+            canary.delay = args.discord_delay
+            recovering = time.monotonic()
+            await wait_until(lambda: len(app.discord_links) == 2 and harness.app_synced(app))
+            results["reconnected_after_s"] = time.monotonic() - recovering
+            results["caught_up"] = canary.voice["mute"] == stable.voice["mute"]
+            results["discord_clients"] = app.status_report()["discord_clients"]
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+            app.app_running = False
+
+    await goxlr.stop()
+    await stable.stop()
+    await canary.stop()
+    oauth.stop()
+
+    healthy = results["both_healthy_ms"]["discord-ipc-0"]["p95"]
+    results["healthy_p95_change_ms"] = results["one_hung_ms"]["discord-ipc-0"]["p95"] - healthy
+    results["health"] = {key: app.health_stats[key] for key in ("probes", "probe_failures", "reconnects")}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100, help="presses to time per phase")
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between presses")
+    parser.add_argument("--discord-delay", type=float, default=0.0, help="fake Discord reply delay (s)")
+    parser.add_argument("--hang-timeout", type=float, default=0.5,
+                        help="Discord command timeout for the run, how soon a hung client is dropped (s)")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "fanout",
+        "environment": harness.environment(),
+        "params": {"events": args.events, "gap": args.gap, "discord_delay": args.discord_delay,
+                   "hang_timeout": args.hang_timeout},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
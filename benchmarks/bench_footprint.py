@@ -0,0 +1,121 @@
+"""
+Footprint benchmark: resident memory once synced, headless vs tray mode
+Runs the app in a fresh interpreter against the local stand-ins, reads its
+status over --status-socket, then stops it with SIGTERM as systemd would
+and checks it exits cleanly (code 0, in time)
+
+Usage:
+    python benchmarks/bench_footprint.py [--runs 3] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import harness
+from bench_startup import wait_for
+
+# Runs in the child: load the app from source, point it at the stand-ins, run main()
+CHILD = r"""
+import importlib.machinery, importlib.util, sys
+app_path, workdir, goxlr_url, socket_path, mode = sys.argv[1:6]
+sys.argv = [app_path, "--status-socket", socket_path] + (["--headless"] if mode == "headless" else [])
+loader = importlib.machinery.SourceFileLoader("goxlr_discord_sync", app_path)
+app = importlib.util.module_from_spec(importlib.util.spec_from_loader("goxlr_discord_sync", loader))
+sys.modules["goxlr_discord_sync"] = app
+loader.exec_module(app)
+
+app.CLIENT_ID_FILE = workdir + "/client_id.txt"
+app.SECRET_FILE = workdir + "/client_secret.txt"
+app.TOKEN_FILE = workdir + "/discord_token.json"
+app.CONFIG_FILE = workdir + "/config.json"
+app.LATENCY_FILE = workdir + "/latency_stats.json"
+app.GOXLR_WEBSOCKET_URL = goxlr_url
+app.main()
+"""
+
+async def read_status(path):
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+async def run_child(goxlr, discord, mode):
+    """Start the app, wait for the first sync, sample it, then SIGTERM it"""
+    workdir = harness.logon_workdir("bench-footprint-")
+    socket_path = os.path.join(workdir, "status.sock")
+    env = dict(os.environ, XDG_RUNTIME_DIR=discord.runtime_dir, PYSTRAY_BACKEND="dummy")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", CHILD, harness.APP_PATH, workdir, goxlr.url, socket_path, mode,
+        env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    try:
+        await wait_for(lambda: os.path.exists(socket_path))
+        status = await read_status(socket_path)
+        while not (status["discord_connected"] and status["goxlr_connected"]):
+            await asyncio.sleep(0.05)
+            status = await read_status(socket_path)
+        await asyncio.sleep(0.5)  # let the tray thread (if any) settle
+        status = await read_status(socket_path)
+
+        loop = asyncio.get_running_loop()
+        stopping = loop.time()
+        process.send_signal(signal.SIGTERM)
+        _, stderr = await asyncio.wait_for(process.communicate(), 10)
+        stop_time = loop.time() - stopping
+    except BaseException:
+        process.kill()
+        raise
+    if process.returncode != 0:
+        raise RuntimeError(f"{mode}: app exited with {process.returncode}: {stderr.decode()[-2000:]}")
+
+    return {
+        "rss_kb": status["rss_kb"],
+        "gui_loaded": status["gui_loaded"],
+        "stop_s": stop_time,
+        "socket_removed": not os.path.exists(socket_path),
+    }
+
+def summarize(samples):
+    return {
+        "rss_kb_median": sorted(s["rss_kb"] for s in samples)[len(samples) // 2],
+        "gui_loaded": samples[-1]["gui_loaded"],
+        "sigterm_to_exit_ms": harness.percentiles([s["stop_s"] for s in samples]),
+        "clean_exits": len(samples),
+        "socket_removed": all(s["socket_removed"] for s in samples),
+    }
+
+async def run(args):
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    await goxlr.start()
+    await discord.start()
+    try:
+        results = {}
+        for mode in ("headless", "tray"):
+            results[mode] = summarize([await run_child(goxlr, discord, mode) for _ in range(args.runs)])
+    finally:
+        await goxlr.stop()
+        await discord.stop()
+    results["headless_saves_kb"] = results["tray"]["rss_kb_median"] - results["headless"]["rss_kb_median"]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "footprint",
+        "environment": harness.environment(),
+        "params": {"runs": args.runs},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+GoXLR request benchmark: many requests in flight on one websocket
+Sends GetStatus queries and cough commands through GoXLRConnection while a
+fader sweep floods the socket with Patch frames, one at a time and then all
+at once, and checks every reply reached the request it belongs to
+
+Usage:
+    python benchmarks/bench_goxlr_requests.py [--requests 200] [--reply-delay 0.005]
+                                              [--patch-rate 500] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import time
+
+import websockets
+
+import harness
+
+async def send_all(conn, requests, concurrent):
+    """Run the requests, return (seconds, per-request latencies, wrong replies)"""
+    latencies, wrong = [], 0
+
+    async def one(data):
+        nonlocal wrong
+        start = time.perf_counter()
+        reply = await conn.request(data)
+        latencies.append(time.perf_counter() - start)
+        # GetStatus must get a Status back, commands an "Ok"
+        if (data == "GetStatus") != (isinstance(reply, dict) and "Status" in reply):
+            wrong += 1
+
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(one(data) for data in requests))
+    else:
+        for data in requests:
+            await one(data)
+    return time.perf_counter() - start, latencies, wrong
+
+async def run(args):
+    app = harness.load_app()
+    goxlr = harness.FakeGoXLR(reply_delay=args.reply_delay)
+    await goxlr.start()
+
+    results = {}
+    async with websockets.connect(goxlr.url) as ws:
+        conn = app.GoXLRConnection(ws)
+        patches = 0
+
+        def on_patch(message, received):
+            nonlocal patches
+            patches += 1
+
+        conn.subscribe(on_patch)
+        reader = asyncio.create_task(conn.run())
+
+        sent = 0
+        async def sweep():
+            nonlocal sent
+            while True:
+                await goxlr.move_fader(sent % 256)
+                sent += 1
+                await asyncio.sleep(1 / args.patch_rate)
+
+        sweeper = asyncio.create_task(sweep())
+        requests = [
+            "GetStatus" if i % 2 else
+            {"Command": [harness.MIXER_SERIAL, {"SetCoughMuteState": "Unmuted"}]}
+            for i in range(args.requests)
+        ]
+        try:
+            for name, concurrent in (("one_at_a_time", False), ("all_in_flight", True)):
+                elapsed, latencies, wrong = await send_all(conn, requests, concurrent)
+                results[name] = {
+                    "seconds": elapsed,
+                    "requests_per_s": len(requests) / elapsed,
+                    "latency_ms": harness.percentiles(latencies),
+                    "wrong_replies": wrong,
+                }
+            sweeper.cancel()
+            await asyncio.gather(sweeper, return_exceptions=True)
+            await asyncio.sleep(0.1)  # last patches in flight
+        finally:
+            sweeper.cancel()
+            reader.cancel()
+            await asyncio.gather(sweeper, reader, return_exceptions=True)
+
+    await goxlr.stop()
+    results["patches_sent"] = sent
+    results["patches_delivered"] = patches
+    results["late_replies"] = conn.stats["late_replies"]
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--reply-delay", type=float, default=0.005, help="seconds GoXLR Utility takes per request")
+    parser.add_argument("--patch-rate", type=float, default=500, help="fader Patch frames per second meanwhile")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    with harness.Quiet():
+        results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "goxlr_requests",
+        "environment": harness.environment(),
+        "params": {"requests": args.requests, "reply_delay": args.reply_delay,
+                   "patch_rate": args.patch_rate},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
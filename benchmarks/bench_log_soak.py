@@ -0,0 +1,129 @@
+"""
+Log soak test: resident memory across a million GoXLR → Discord events
+Each event logs what a Cough press logs on the hot path. Runs a windowed
+build's setup (no stdout) in a fresh interpreter: the ring buffer (and the
+rotating log file) must keep memory flat, where the old io.StringIO stdout
+kept every line
+
+Usage:
+    python benchmarks/bench_log_soak.py [--events 1000000] [--legacy-events 100000]
+                                        [--output results.json]
+Exits with 1 if memory grows after the ring buffer has filled up.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import harness
+
+FLAT_KB = 1024  # allowed growth after warm-up (allocator noise)
+
+# Runs in the child: a windowed build has no stdout/stderr
+CHILD = r"""
+import io, json, sys, time
+sys.path.insert(0, %r)
+variant, events, workdir = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+sys.stdout = sys.stderr = None
+import harness
+app = harness.load_app()
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+if variant == "stringio":
+    # As before: print into the StringIO that replaced stdout
+    sys.stdout = io.StringIO()
+    def event(n):
+        print("Cough [S220202153DI7]: Unmuted → MutedToAll")
+        print(f"  → Discord: Muted (took {0.001:.2f}s)")
+        print(f"  Total time from event: {0.002:.2f}s (queued {0.0:.2f}s, coalesced so far: {n})")
+else:
+    app.setup_logging()
+    app.config["log_level"] = "debug" if variant.startswith("debug") else "info"
+    if variant == "debug_file":
+        app.config.update(log_file=workdir + "/soak.log", log_file_max_kb=256, log_file_backups=2)
+    app.apply_log_config()
+    log = app.log
+    def event(n):
+        log.debug("Cough [%%s]: %%s → %%s", "S220202153DI7", "Unmuted", "MutedToAll")
+        log.debug("  → Discord: %%s (took %%.2fs)", "Muted", 0.001)
+        log.debug("  Total time from event: %%.2fs (queued %%.2fs, coalesced so far: %%d)",
+                  0.002, 0.0, n)
+        if n %% 1000 == 0:
+            log.info(f"Discord connection lost (probe timed out), detected within {2.0:.1f}s")
+
+samples = []
+step = max(1, events // 10)
+start = time.perf_counter()
+for n in range(events):
+    event(n)
+    if n %% step == 0:
+        samples.append(rss_kb())
+samples.append(rss_kb())
+elapsed = time.perf_counter() - start
+
+buffered = len(app.log_buffer.lines) if variant != "stringio" else None
+json.dump({"rss_kb": samples, "us_per_event": elapsed / events * 1e6,
+           "buffered_lines": buffered}, open(workdir + "/result.json", "w"))
+""" % (harness.BENCH_DIR,)
+
+def run_child(variant, events):
+    workdir = tempfile.mkdtemp(prefix="bench-soak-")
+    env = dict(os.environ, PYSTRAY_BACKEND="dummy")
+    subprocess.run([sys.executable, "-c", CHILD, variant, str(events), workdir],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(os.path.join(workdir, "result.json")) as f:
+        result = json.load(f)
+
+    samples = result.pop("rss_kb")
+    result.update({
+        "events": events,
+        "rss_kb_start": samples[0],
+        "rss_kb_end": samples[-1],
+        # The first sample is before the ring buffer has filled up
+        "growth_after_warmup_kb": samples[-1] - samples[1],
+        "rss_kb_samples": samples,
+    })
+    log_files = [name for name in os.listdir(workdir) if name.startswith("soak.log")]
+    if log_files:
+        result["log_files_kb"] = sorted(os.path.getsize(os.path.join(workdir, name)) // 1024
+                                        for name in log_files)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--legacy-events", type=int, default=100_000,
+                        help="events for the old StringIO stdout (it keeps every line)")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = {
+        # Default level: the hot path logs nothing
+        "info": run_child("info", args.events),
+        # Every line logged: kept in the ring buffer only
+        "debug": run_child("debug", args.events),
+        # ... and written to size-capped rotating files
+        "debug_file": run_child("debug_file", args.events),
+        "stringio": run_child("stringio", args.legacy_events),
+    }
+    flat = all(results[name]["growth_after_warmup_kb"] < FLAT_KB for name in ("info", "debug", "debug_file"))
+
+    harness.write_results({
+        "benchmark": "log_soak",
+        "environment": harness.environment(),
+        "params": {"events": args.events, "legacy_events": args.legacy_events, "flat_kb": FLAT_KB},
+        **results,
+        "flat": flat,
+    }, args.output)
+    sys.exit(0 if flat else 1)
+
+if __name__ == "__main__":
+    main()
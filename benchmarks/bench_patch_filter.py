@@ -0,0 +1,139 @@
+"""
+Micro-benchmark: CPU cost per GoXLR websocket frame in the listen loop
+Compares the old decode-everything path with the app's own Patch handler
+(the on_patch its GoXLR connection calls), with the state mirror off and on
+
+Usage:
+    python benchmarks/bench_patch_filter.py [--frames 200000] [--cough-ratio 0.01]
+                                            [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import harness
+from bench_e2e import wait_ready
+
+def make_frames(count, cough_ratio, seed=1):
+    """Realistic frame mix: mostly fader/volume/meter patches, a few cough ones"""
+    rng = random.Random(seed)
+    serial = harness.MIXER_SERIAL
+    noise_paths = [
+        f"/mixers/{serial}/levels/volumes/{channel}"
+        for channel in ("Mic", "Chat", "Music", "Game", "Console", "LineIn", "System", "Sample")
+    ] + [
+        f"/mixers/{serial}/fader_status/{fader}/scribble/bottom_text" for fader in "ABCD"
+    ]
+
+    frames = []
+    for _ in range(count):
+        if rng.random() < cough_ratio:
+            ops = [{"op": "replace", "path": f"/mixers/{serial}/cough_button/state",
+                    "value": rng.choice(("Unmuted", "MutedToAll"))}]
+        else:
+            # Fader sweeps often arrive as a few volume ops in one frame
+            ops = [{"op": "replace", "path": rng.choice(noise_paths), "value": rng.randint(0, 255)}
+                   for _ in range(rng.randint(1, 4))]
+        frames.append(json.dumps({"id": 0, "data": {"Patch": ops}}))
+    return frames
+
+def handle_before(message):
+    """The listen loop as it was: decode every frame, then scan its patches"""
+    data = json.loads(message)
+    found = None
+    if "data" in data and "Patch" in data["data"]:
+        for patch in data["data"]["Patch"]:
+            if "cough_button/state" in patch.get("path", ""):
+                found = patch.get("value")
+    return found
+
+def time_per_frame(handler, frames, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for message in frames:
+            handler(message)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(frames)
+
+async def time_on_patch(app, frames, repeat):
+    """Run main_loop against the stand-ins, then feed the frames to its real on_patch"""
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    oauth = harness.FakeOAuth()
+    await goxlr.start()
+    await discord.start()
+    oauth.start()
+    harness.configure_app(app, goxlr.url, discord, oauth.url)
+    app.config["state_mirror"] = True  # seeded on connect, switched per run below
+
+    results = {}
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_ready(app, discord)
+            on_patch = app.goxlr_conn.subscribers[0]
+
+            def handler(message):
+                on_patch(message, time.monotonic())
+
+            for mirror in (False, True):
+                app.config["state_mirror"] = mirror
+                key = "on_patch_mirror_on" if mirror else "on_patch_mirror_off"
+                results[key] = time_per_frame(handler, frames, repeat)
+                if app.JSON_BACKEND != "json":
+                    # Same handler, decoding with the standard library
+                    app.json_loads = json.loads
+                    results[f"{key}_stdlib_json"] = time_per_frame(handler, frames, repeat)
+                    app.json_loads = app.orjson.loads
+
+            # Sanity check: the handler saw the last press, the mirror applied every op
+            last = next(m for m in reversed(frames) if "cough_button" in m)
+            results["cough_tracked"] = app.goxlr_mixers.cough[harness.MIXER_SERIAL] == \
+                json.loads(last)["data"]["Patch"][0]["value"]
+            results["mirror_failed_ops"] = app.goxlr_state.stats["failed"]
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+            app.app_running = False
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--cough-ratio", type=float, default=0.01, help="share of frames with a cough patch")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    app = harness.load_app()
+    frames = make_frames(args.frames, args.cough_ratio)
+
+    timed = asyncio.run(time_on_patch(app, frames, args.repeat))
+    checks = {key: timed.pop(key) for key in ("cough_tracked", "mirror_failed_ops")}
+    results = {
+        "benchmark": "patch_filter",
+        "environment": harness.environment(),
+        "params": {"frames": args.frames, "cough_ratio": args.cough_ratio},
+        "json_backend": app.JSON_BACKEND,
+        "default_state_mirror": app.DEFAULT_CONFIG["state_mirror"],
+        "ns_per_frame": {"before": time_per_frame(handle_before, frames, args.repeat), **timed},
+        **checks,
+    }
+
+    before = results["ns_per_frame"]["before"]
+    results["speedup"] = {
+        name: before / cost for name, cost in results["ns_per_frame"].items() if name != "before"
+    }
+    harness.write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Reconciliation benchmark: presses made while a side is down must still reach Discord
+Measures how long Discord takes to agree with the GoXLR once the missing side is back
+
+Scenarios:
+    discord_outage  - Discord stops, the Cough button is pressed, Discord comes back
+    goxlr_restart   - GoXLR Utility stops, the button changes meanwhile, the daemon comes back
+    press_on_connect - the button is pressed right after the daemon's GetStatus reply, on
+                       reconnect and on a state mirror reload: neither press may be lost
+
+Usage:
+    python benchmarks/bench_reconcile.py [--outage 1.0] [--presses 5] [--runs 5]
+                                         [--retry-cap 0.5] [--output results.json]
+"""
+
+import argparse
+import asyncio
+
+import harness
+from bench_startup import free_port, wait_for
+
+COUGH_STATES = ("Unmuted", "MutedToAll")
+
+def cough(goxlr):
+    return goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]
+
+async def discord_outage(app, goxlr, discord, args):
+    """Press while Discord is gone, return seconds from its return to agreement"""
+    await discord.stop()
+    for writer in list(discord.subscribers):
+        writer.close()
+    await wait_for(lambda: not app.discord_ready.is_set())
+
+    state = cough(goxlr)["state"]
+    for _ in range(args.presses):
+        state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+        await goxlr.set_cough(state)
+        await asyncio.sleep(args.outage / args.presses)
+
+    loop = asyncio.get_running_loop()
+    back = loop.time()
+    await discord.start()
+    await wait_for(lambda: discord.voice["mute"] == (state != "Unmuted"))
+    return loop.time() - back
+
+async def goxlr_restart(app, goxlr, discord, port, args):
+    """Change the button while the daemon is down, return seconds from restart to agreement"""
+    await goxlr.stop()
+    await wait_for(lambda: not app.goxlr_ready.is_set())
+
+    # The daemon keeps its own state; here it changes while nobody is listening
+    state = COUGH_STATES[1] if cough(goxlr)["state"] == COUGH_STATES[0] else COUGH_STATES[0]
+    cough(goxlr)["state"] = state
+    await asyncio.sleep(args.outage)
+
+    loop = asyncio.get_running_loop()
+    back = loop.time()
+    await goxlr.start(port)
+    await wait_for(lambda: discord.voice["mute"] == (state != "Unmuted"))
+    return loop.time() - back
+
+async def press_on_connect(app, goxlr, discord, port):
+    """Press right after GetStatus, return (seconds from restart to agreement, mirror kept up)"""
+    await goxlr.stop()
+    await wait_for(lambda: not app.goxlr_ready.is_set())
+
+    # The reply still says the old state, the patch right behind it the new one
+    state = COUGH_STATES[1] if cough(goxlr)["state"] == COUGH_STATES[0] else COUGH_STATES[0]
+    goxlr.after_status = state
+    loop = asyncio.get_running_loop()
+    back = loop.time()
+    await goxlr.start(port)
+    await wait_for(lambda: discord.voice["mute"] == (state != "Unmuted"))
+    agreed = loop.time() - back
+
+    # A patch the mirror can't apply makes it reload, with a press right behind that reply
+    await wait_for(lambda: app.goxlr_ready.is_set())
+    state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+    goxlr.after_status = state
+    await goxlr.send_patch([{"op": "remove", "path": f"/mixers/{harness.MIXER_SERIAL}/no_such_field"}])
+    path = f"/mixers/{harness.MIXER_SERIAL}/cough_button/state"
+    await wait_for(lambda: goxlr.after_status is None and app.goxlr_state.ready)
+    await wait_for(lambda: discord.voice["mute"] == (state != "Unmuted"))
+    await asyncio.sleep(0.1)  # let a late reseed overwrite it, if it's going to
+    return agreed, app.goxlr_state.get(path) == state
+
+async def run_once(args):
+    app = harness.load_app()
+    port = free_port()
+
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    oauth = harness.FakeOAuth()
+    await goxlr.start(port)
+    await discord.start()
+    oauth.start()
+    harness.configure_app(app, goxlr.url, discord, oauth.url)
+    app.config["state_mirror"] = True
+    app.RETRY_MIN_DELAY = min(app.RETRY_MIN_DELAY, args.retry_cap / 4)
+    app.DISCORD_RETRY_DELAY = app.GOXLR_RETRY_DELAY = args.retry_cap
+
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_for(lambda: harness.app_synced(app))
+            outage = await discord_outage(app, goxlr, discord, args)
+            restart = await goxlr_restart(app, goxlr, discord, port, args)
+            on_connect, mirror_kept = await press_on_connect(app, goxlr, discord, port)
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+    return outage, restart, on_connect, mirror_kept, dict(app.sync_stats), app.latency_report()["converge"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--outage", type=float, default=1.0, help="seconds each side stays down")
+    parser.add_argument("--presses", type=int, default=5, help="presses while Discord is down")
+    parser.add_argument("--retry-cap", type=float, default=0.5, help="longest retry delay (s) for both sides")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    outages, restarts, on_connects, mirror_kept, missed, saved, converge = [], [], [], 0, 0, 0, None
+    for _ in range(args.runs):
+        outage, restart, on_connect, kept, stats, converge = asyncio.run(run_once(args))
+        outages.append(outage)
+        restarts.append(restart)
+        on_connects.append(on_connect)
+        mirror_kept += kept
+        missed += stats["missed"]
+        saved += stats["writes_saved"]
+
+    harness.write_results({
+        "benchmark": "reconcile",
+        "environment": harness.environment(),
+        "params": {"outage": args.outage, "presses": args.presses,
+                   "retry_cap": args.retry_cap, "runs": args.runs},
+        # Bounded by the retry cap (plus one write), whatever the outage length
+        "discord_back_to_agreement_ms": harness.percentiles(outages),
+        "goxlr_back_to_agreement_ms": harness.percentiles(restarts),
+        "press_on_connect_to_agreement_ms": harness.percentiles(on_connects),
+        # Runs where the press right after a mirror reload's reply stayed in the mirror
+        "mirror_reload_kept_press": f"{mirror_kept}/{args.runs}",
+        "missed_changes_caught_up": missed,
+        # Reconnect resyncs that Discord already agreed with
+        "writes_saved": saved,
+        "last_run_converge": converge,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Discord RPC deadline benchmark: Discord freezes with its pipe still open
+Runs main_loop against the local stand-ins, then stops the fake Discord
+from answering (the socket stays connected) and presses Cough. Measures how
+soon the tray shows "stalled", that GoXLR requests and presses are still
+handled meanwhile, and how soon the latest press reaches Discord once it
+answers again. Repeated for each --timeouts value (discord_command_timeout).
+
+Usage:
+    python benchmarks/bench_rpc_deadline.py [--timeouts 0.25 1 2] [--presses 20]
+                                            [--output results.json]
+"""
+
+import argparse
+import asyncio
+import time
+
+import harness
+from bench_e2e import COUGH_STATES, wait_ready
+
+async def wait_until(predicate, timeout=30):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        if loop.time() > deadline:
+            raise RuntimeError("timed out")
+        await asyncio.sleep(0.005)
+
+async def run_once(command_timeout, args):
+    app = harness.load_app()
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    oauth = harness.FakeOAuth()
+
+    await goxlr.start()
+    await discord.start()
+    oauth.start()
+    harness.configure_app(app, goxlr.url, discord, oauth.url)
+    app.config["discord_command_timeout"] = command_timeout
+    # Health checks alone would also notice, but later: this times the write deadline
+    app.config["discord_probe_interval"] = 60
+
+    results = {"discord_command_timeout": command_timeout}
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_ready(app, discord)
+            state = goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]["state"]
+
+            # Discord freezes: commands are read but never answered
+            discord.delay = 3600
+            state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+            pressed = await goxlr.set_cough(state)
+            await wait_until(lambda: app.tray_state() == "stalled")
+            results["stalled_after_s"] = time.monotonic() - pressed
+
+            # The GoXLR side carries on: more presses, and requests still answered
+            events_before = app.sync_stats["events"]
+            request_times = []
+            for _ in range(args.presses):
+                state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+                await goxlr.set_cough(state)
+                start = time.perf_counter()
+                await app.goxlr_conn.request("GetStatus")
+                request_times.append(time.perf_counter() - start)
+            results["presses_handled_while_frozen"] = app.sync_stats["events"] - events_before
+            results["goxlr_request_ms_while_frozen"] = harness.percentiles(request_times)
+
+            # Discord answers again: reconnected in the background, latest press applied
+            # (after any reconnect attempt still waiting out DISCORD_SETUP_TIMEOUT)
+            discord.delay = 0
+            thawed = time.monotonic()
+            await wait_until(lambda: harness.app_synced(app) and app.tray_state() != "stalled")
+            results["recovered_after_s"] = time.monotonic() - thawed
+            results["latest_press_applied"] = discord.voice["mute"] == (state != "Unmuted")
+            results["rpc"] = {key: app.health_stats[key] for key in ("rpc_ok", "rpc_timeouts", "rpc_errors")}
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+            app.app_running = False
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+    return results
+
+async def run(args):
+    return [await run_once(command_timeout, args) for command_timeout in args.timeouts]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timeouts", type=float, nargs="+", default=[0.25, 1, 2],
+                        help="discord_command_timeout values to try (s)")
+    parser.add_argument("--presses", type=int, default=20, help="presses made while Discord is frozen")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "rpc_deadline",
+        "environment": harness.environment(),
+        "params": {"timeouts": args.timeouts, "presses": args.presses},
+        "runs": results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: rule matching cost per patch, trie vs. checking every rule
+Shows that matching time follows path depth, not the number of rules
+
+Usage:
+    python benchmarks/bench_rules.py [--rules 10 100 300 1000] [--patches 20000]
+                                     [--output results.json]
+"""
+
+import argparse
+import random
+import time
+
+import harness
+
+CHANNELS = ("Mic", "Chat", "Music", "Game", "Console", "LineIn", "System", "Sample",
+            "Headphones", "MicMonitor", "LineOut")
+FADERS = "ABCD"
+
+def make_rules(count, rng):
+    """A mix of exact and wildcard rules over realistic GoXLR paths"""
+    templates = [
+        lambda: f"/mixers/*/fader_status/{rng.choice(FADERS)}/mute_state",
+        lambda: f"/mixers/{harness.MIXER_SERIAL}/levels/volumes/{rng.choice(CHANNELS)}",
+        lambda: f"/mixers/*/levels/volumes/{rng.choice(CHANNELS)}",
+        lambda: f"/mixers/*/effects/preset_names/Preset{rng.randint(1, 6)}",
+        lambda: f"/mixers/*/button_down/Bleep{rng.randint(0, 99)}",
+        lambda: f"/mixers/*/router/{rng.choice(CHANNELS)}/{rng.choice(CHANNELS)}",
+        lambda: f"/mixers/*/sampler/banks/Bank{rng.choice('ABC')}/{rng.choice(('TopLeft', 'TopRight'))}/samples",
+    ]
+    return [{"path": rng.choice(templates)(), "action": rng.choice(("mute", "deaf"))}
+            for _ in range(count)]
+
+def make_patches(count, rng):
+    serial = harness.MIXER_SERIAL
+    paths = (
+        [f"/mixers/{serial}/levels/volumes/{c}" for c in CHANNELS]
+        + [f"/mixers/{serial}/fader_status/{f}/mute_state" for f in FADERS]
+        + [f"/mixers/{serial}/router/{a}/{b}" for a in CHANNELS[:4] for b in CHANNELS[8:]]
+        + [f"/mixers/{serial}/cough_button/state", f"/mixers/{serial}/effects/active_preset"]
+    )
+    return [rng.choice(paths) for _ in range(count)]
+
+class LinearMatcher:
+    """The naive alternative: compare the path with every rule"""
+
+    def __init__(self, rules):
+        self.rules = [(rule["path"][1:].split("/"), rule) for rule in rules]
+
+    def match(self, path, value):
+        tokens = path[1:].split("/")
+        hits = []
+        for pattern, rule in self.rules:
+            if len(pattern) == len(tokens) and all(p == "*" or p == t for p, t in zip(pattern, tokens)):
+                hits.append((path, rule, value))
+        return hits
+
+def time_per_patch(matcher, patches, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for path in patches:
+            matcher.match(path, 0)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(patches)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--patches", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    app = harness.load_app()
+    rng = random.Random(1)
+    patches = make_patches(args.patches, rng)
+
+    runs = []
+    for count in args.rules:
+        rules = make_rules(count, rng)
+        engine = app.RuleEngine(rules)
+        linear = LinearMatcher(rules)
+
+        # Sanity check: both must find the same rules
+        for path in patches[:500]:
+            assert sorted(map(id, (r for _, r, _ in engine.match(path, 0)))) == \
+                   sorted(map(id, (r for _, r, _ in linear.match(path, 0))))
+
+        trie_ns = time_per_patch(engine, patches, args.repeat)
+        linear_ns = time_per_patch(linear, patches, args.repeat)
+        runs.append({
+            "rules": count,
+            "trie_ns_per_patch": trie_ns,
+            "linear_ns_per_patch": linear_ns,
+            "speedup": linear_ns / trie_ns,
+        })
+
+    harness.write_results({
+        "benchmark": "rules",
+        "environment": harness.environment(),
+        "params": {"patches": args.patches},
+        "runs": runs,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
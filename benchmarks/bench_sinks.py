@@ -0,0 +1,115 @@
+"""
+Output sink benchmark: Cough press → Discord, OBS, a webhook and MQTT lights
+Runs main_loop against local stand-ins for all of them, once without sinks
+and once with an OBS sink, a webhook, an MQTT light and a second MQTT light
+that never answers in time. Times each press per output: the Discord
+latency must not change, and the hung light must only show up in its own
+health (timeouts, not responding).
+
+Usage:
+    python benchmarks/bench_sinks.py [--events 100] [--slow-delay 5] [--sink-timeout 0.2]
+                                     [--output results.json]
+"""
+
+import argparse
+import asyncio
+
+import harness
+from bench_e2e import COUGH_STATES, wait_ready
+
+async def measure(goxlr, outputs, events, gap):
+    """Toggle one press at a time, time patch → received on every output"""
+    samples = {name: [] for name in outputs}
+    state = goxlr.status["mixers"][harness.MIXER_SERIAL]["cough_button"]["state"]
+
+    for _ in range(events):
+        state = COUGH_STATES[1] if state == COUGH_STATES[0] else COUGH_STATES[0]
+        arrived = {name: output.wait_for_mute(state != "Unmuted") for name, output in outputs.items()}
+        sent = await goxlr.set_cough(state)
+        for name, future in arrived.items():
+            samples[name].append(await asyncio.wait_for(future, 10) - sent)
+        await asyncio.sleep(gap)
+
+    return {name: harness.percentiles(values) for name, values in samples.items()}
+
+async def run_once(args, with_sinks):
+    app = harness.load_app()
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord(delay=args.discord_delay)
+    oauth = harness.FakeOAuth()
+    obs = harness.FakeOBS(password="bench-password")
+    webhook = harness.FakeWebhook()
+    light = harness.FakeMQTT()
+    slow_light = harness.FakeMQTT(delay=args.slow_delay)
+
+    await goxlr.start()
+    await discord.start()
+    oauth.start()
+    for sink in (obs, webhook, light, slow_light):
+        await sink.start()
+    harness.configure_app(app, goxlr.url, discord, oauth.url)
+
+    outputs = {"discord": discord}
+    if with_sinks:
+        app.config["sinks"] = [
+            {"type": "obs", "url": obs.url, "password": "bench-password", "input": "Mic/Aux"},
+            {"type": "webhook", "url": webhook.url},
+            {"type": "mqtt", "name": "light", "port": light.port, "topic": "studio/onair"},
+            {"type": "mqtt", "name": "slow_light", "port": slow_light.port, "topic": "desk/onair",
+             "timeout": args.sink_timeout, "retries": 1},
+        ]
+        outputs.update(obs=obs, webhook=webhook, light=light)
+    with harness.Quiet():
+        app.build_sinks()
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            await wait_ready(app, discord)
+            results = {"latency_ms": await measure(goxlr, outputs, args.events, args.gap)}
+            results["sinks"] = app.status_report()["sinks"]
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+            app.app_running = False
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+    for sink in (obs, webhook, light, slow_light):
+        await sink.stop()
+    if with_sinks:
+        results["light_retained"] = light.retained
+        results["slow_light_received"] = len(slow_light.mutes)
+    return results
+
+async def run(args):
+    without = await run_once(args, with_sinks=False)
+    with_sinks = await run_once(args, with_sinks=True)
+    return {
+        "without_sinks": without,
+        "with_sinks": with_sinks,
+        # A hung light must not slow Discord down
+        "discord_p95_change_ms": (with_sinks["latency_ms"]["discord"]["p95"]
+                                  - without["latency_ms"]["discord"]["p95"]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100, help="presses to time")
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between presses")
+    parser.add_argument("--discord-delay", type=float, default=0.0, help="fake Discord reply delay (s)")
+    parser.add_argument("--slow-delay", type=float, default=5.0, help="seconds the slow light takes to answer")
+    parser.add_argument("--sink-timeout", type=float, default=0.2, help="the slow light's send timeout (s)")
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    harness.write_results({
+        "benchmark": "sinks",
+        "environment": harness.environment(),
+        "params": {"events": args.events, "gap": args.gap, "discord_delay": args.discord_delay,
+                   "slow_delay": args.slow_delay, "sink_timeout": args.sink_timeout},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
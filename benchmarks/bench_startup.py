@@ -0,0 +1,106 @@
+"""
+Startup benchmark: time until Discord and GoXLR are both connected
+Each side comes up after its own delay; with independent supervisors the
+app should be ready shortly after the slower one, not after their sum
+
+Usage:
+    python benchmarks/bench_startup.py [--goxlr-after 1.0] [--discord-after 1.5]
+                                       [--retry-cap 0.2] [--runs 5] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import socket
+
+import harness
+
+def free_port():
+    """A port the fake GoXLR can be (re)started on, so the app's URL stays valid"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_for(condition, timeout=30):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise RuntimeError("timed out")
+        await asyncio.sleep(0.005)
+
+async def run_once(args):
+    app = harness.load_app()
+    port = free_port()
+
+    goxlr = harness.FakeGoXLR()
+    discord = harness.FakeDiscord()
+    oauth = harness.FakeOAuth()
+    oauth.start()
+    harness.configure_app(app, f"ws://127.0.0.1:{port}/api/websocket", discord, oauth.url)
+    # Short retry caps, so the overshoot past the slower side stays small and readable
+    app.RETRY_MIN_DELAY = min(app.RETRY_MIN_DELAY, args.retry_cap / 4)
+    app.DISCORD_RETRY_DELAY = app.GOXLR_RETRY_DELAY = args.retry_cap
+
+    loop = asyncio.get_running_loop()
+    with harness.Quiet():
+        main_task = asyncio.create_task(app.main_loop())
+        try:
+            async def start_goxlr():
+                await asyncio.sleep(args.goxlr_after)
+                await goxlr.start(port)
+
+            async def start_discord():
+                await asyncio.sleep(args.discord_after)
+                await discord.start()
+
+            await asyncio.gather(start_goxlr(), start_discord())
+            await wait_for(lambda: app.health_stats["ready_after"] is not None)
+            startup = app.health_stats["ready_after"]
+
+            # Recovery: restart the GoXLR daemon while Discord stays up
+            await goxlr.stop()
+            await wait_for(lambda: not app.goxlr_ready.is_set())
+            await asyncio.sleep(args.goxlr_after)
+            restarted = loop.time()
+            await goxlr.start(port)
+            await wait_for(app.goxlr_ready.is_set)
+            recovery = loop.time() - restarted
+        finally:
+            main_task.cancel()
+            await asyncio.gather(main_task, return_exceptions=True)
+
+    await goxlr.stop()
+    await discord.stop()
+    oauth.stop()
+    return startup, recovery
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--goxlr-after", type=float, default=1.0, help="seconds before GoXLR Utility starts")
+    parser.add_argument("--discord-after", type=float, default=1.5, help="seconds before Discord starts")
+    parser.add_argument("--retry-cap", type=float, default=0.2, help="longest retry delay (s) for both sides")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    startups, recoveries = [], []
+    for _ in range(args.runs):
+        startup, recovery = asyncio.run(run_once(args))
+        startups.append(startup)
+        recoveries.append(recovery)
+
+    slower = max(args.goxlr_after, args.discord_after)
+    harness.write_results({
+        "benchmark": "startup",
+        "environment": harness.environment(),
+        "params": {"goxlr_after": args.goxlr_after, "discord_after": args.discord_after,
+                   "retry_cap": args.retry_cap, "runs": args.runs},
+        # Overshoot past the slower side is the retry delay that was pending when it came up
+        "ready_after_ms": harness.percentiles(startups),
+        "slower_side_ms": slower * 1000,
+        "sum_of_sides_ms": (args.goxlr_after + args.discord_after) * 1000,
+        "goxlr_recovery_ms": harness.percentiles(recoveries),
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Tray icon benchmark: cost of getting the first icon into the tray backend
+Compares drawing icons with Pillow (as before) with the pre-rendered set,
+each in a fresh interpreter, by time and resident memory
+
+Usage:
+    python benchmarks/bench_tray_icons.py [--runs 5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import harness
+
+# Runs in the child, after the app module is loaded: make the icon(s) and
+# serialise them the way pystray's Windows backend does (save as ICO)
+CHILD = r"""
+import io, json, os, sys, time
+sys.path.insert(0, %r)
+import harness
+app = harness.load_app()
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+variant, states = sys.argv[1], sys.argv[2].split(",")
+before = rss_kb()
+start = time.perf_counter()
+
+if variant == "drawn":
+    from PIL import Image, ImageDraw
+    colors = {"starting": "orange", "muted": "red", "unmuted": "green", "error": "gray", "degraded": "gold"}
+    for state in states:
+        image = Image.new('RGB', (64, 64), color='black')
+        ImageDraw.Draw(image).ellipse([8, 8, 56, 56], fill=colors[state], outline='white', width=2)
+        image.save(io.BytesIO(), format='ICO')
+else:
+    for state in states:
+        app.get_tray_icon_image(state).save(io.BytesIO(), 'ICO')
+
+elapsed = time.perf_counter() - start
+print(json.dumps({"ms": elapsed * 1000, "rss_kb": rss_kb() - before,
+                  "pillow_loaded": "PIL.Image" in sys.modules}))
+""" % (harness.BENCH_DIR,)
+
+def run_child(variant, states):
+    env = dict(os.environ, PYSTRAY_BACKEND="dummy")
+    output = subprocess.run([sys.executable, "-c", CHILD, variant, ",".join(states)],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure(variant, states, runs):
+    samples = [run_child(variant, states) for _ in range(runs)]
+    return {
+        "ms": harness.percentiles([s["ms"] / 1000 for s in samples]),
+        "rss_kb_median": sorted(s["rss_kb"] for s in samples)[len(samples) // 2],
+        "pillow_loaded": samples[-1]["pillow_loaded"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    all_states = ["starting", "muted", "unmuted", "error", "degraded"]
+    results = {}
+    for variant in ("drawn", "prerendered"):
+        results[variant] = {
+            # Startup only needs the "starting" icon
+            "startup_icon": measure(variant, ["starting"], args.runs),
+            "all_states": measure(variant, all_states, args.runs),
+        }
+
+    harness.write_results({
+        "benchmark": "tray_icons",
+        "environment": harness.environment(),
+        "params": {"runs": args.runs, "states": all_states},
+        **results,
+    }, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,624 @@
+"""
+Benchmark harness - local stand-ins for GoXLR Utility, Discord, OAuth and the output sinks
+Lets the benchmarks drive the real goxlr_discord_sync code on a plain Linux box
+"""
+
+import asyncio
+import importlib.util
+import importlib.machinery
+import json
+import os
+import platform
+import struct
+import sys
+import tempfile
+import threading
+import time
+import http.server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(os.path.dirname(BENCH_DIR), "goxlr_discord_sync.pyw")
+
+MIXER_SERIAL = "S220202153DI7"
+COUGH_PATH = f"/mixers/{MIXER_SERIAL}/cough_button/state"
+
+def load_app():
+    """Import goxlr_discord_sync.pyw as a module (no tray window is created)"""
+    # pystray picks its backend at import time, the dummy one needs no display
+    os.environ.setdefault("PYSTRAY_BACKEND", "dummy")
+
+    loader = importlib.machinery.SourceFileLoader("goxlr_discord_sync", APP_PATH)
+    spec = importlib.util.spec_from_loader("goxlr_discord_sync", loader)
+    app = importlib.util.module_from_spec(spec)
+    sys.modules["goxlr_discord_sync"] = app
+    loader.exec_module(app)
+    return app
+
+# === Fake GoXLR Utility ===
+
+def make_status(serials=(MIXER_SERIAL,), cough_state="Unmuted"):
+    """Minimal GetStatus tree, shaped like the GoXLR Utility daemon's"""
+    return {
+        "config": {"daemon_version": "1.0.0-bench"},
+        "mixers": {
+            serial: {
+                "hardware": {"serial_number": serial},
+                "fader_status": {
+                    channel: {"channel": "Mic", "mute_type": "MuteToAll", "mute_state": "Unmuted",
+                              "scribble": {"bottom_text": ""}}
+                    for channel in ("A", "B", "C", "D")
+                },
+                "cough_button": {"is_toggle": True, "mute_type": "All", "state": cough_state},
+                "levels": {"volumes": {
+                    channel: 200
+                    for channel in ("Mic", "Chat", "Music", "Game", "Console", "LineIn", "System", "Sample")
+                }},
+            }
+            for serial in serials
+        },
+    }
+
+class FakeGoXLR:
+    """Websocket server speaking the GetStatus / Patch protocol"""
+
+    def __init__(self, status=None, reply_delay=0):
+        self.status = status or make_status()
+        self.reply_delay = reply_delay  # seconds the daemon takes per request, handled concurrently
+        self.after_status = None  # cough state to press right after the next GetStatus reply
+        self.clients = set()
+        self.connected = asyncio.Event()
+        self.received = []  # every request frame, decoded
+        self.cough_commands = []  # (monotonic time, serial, state)
+        self._waiters = []
+        self._server = None
+        self.url = None
+
+    async def start(self, port=0):
+        """Listen on port (0 = any free one); pass the old port to restart in place"""
+        import websockets
+        self._server = await websockets.serve(self._handle, "127.0.0.1", port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/api/websocket"
+        return self.url
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, ws):
+        self.clients.add(ws)
+        self.connected.set()
+        try:
+            async for message in ws:
+                request = json.loads(message)
+                self.received.append(request)
+                if self.reply_delay:
+                    asyncio.create_task(self._reply_later(ws, request))
+                    continue
+                reply = self.answer(request)
+                if reply is not None:
+                    await ws.send(json.dumps(reply))
+                if request.get("data") == "GetStatus" and self.after_status is not None:
+                    state, self.after_status = self.after_status, None
+                    await self.set_cough(state)
+                await self._run_command(request)
+        except Exception:
+            pass
+        finally:
+            self.clients.discard(ws)
+            if not self.clients:
+                self.connected.clear()
+
+    async def _reply_later(self, ws, request):
+        await asyncio.sleep(self.reply_delay)
+        try:
+            await ws.send(json.dumps(self.answer(request)))
+        except Exception:
+            pass
+
+    def answer(self, request):
+        """Build the reply for one request frame"""
+        data = request.get("data")
+        if data == "GetStatus":
+            return {"id": request.get("id"), "data": {"Status": self.status}}
+        if isinstance(data, dict) and "Command" in data:
+            return {"id": request.get("id"), "data": "Ok"}
+        return {"id": request.get("id"), "data": {"Error": f"Unknown request {data!r}"}}
+
+    async def _run_command(self, request):
+        """Apply a cough command and send its Patch, like the daemon does"""
+        data = request.get("data")
+        if not isinstance(data, dict) or "Command" not in data:
+            return
+        serial, command = data["Command"]
+        if isinstance(command, dict) and "SetCoughMuteState" in command:
+            state = command["SetCoughMuteState"]
+            now = time.monotonic()
+            self.cough_commands.append((now, serial, state))
+            for waiter in list(self._waiters):
+                if waiter[0] == (serial, state) and not waiter[1].done():
+                    waiter[1].set_result(now)
+                    self._waiters.remove(waiter)
+            await self.set_cough(state, serial)
+
+    def wait_for_cough(self, state, serial=MIXER_SERIAL):
+        """Future resolved with the time a SetCoughMuteState command arrives"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(((serial, state), future))
+        return future
+
+    async def send_patch(self, ops):
+        """Push a Patch frame to every client, return the monotonic send time"""
+        frame = json.dumps({"id": 0, "data": {"Patch": ops}})
+        sent = time.monotonic()
+        for ws in list(self.clients):
+            await ws.send(frame)
+        return sent
+
+    async def set_cough(self, state, serial=MIXER_SERIAL):
+        self.status["mixers"][serial]["cough_button"]["state"] = state
+        return await self.send_patch([{
+            "op": "replace",
+            "path": f"/mixers/{serial}/cough_button/state",
+            "value": state,
+        }])
+
+    async def move_fader(self, value, serial=MIXER_SERIAL):
+        """Unrelated traffic, like someone sweeping a fader"""
+        return await self.send_patch([{
+            "op": "replace",
+            "path": f"/mixers/{serial}/levels/volumes/Music",
+            "value": value,
+        }])
+
+# === Fake Discord IPC ===
+
+OP_HANDSHAKE = 0
+OP_FRAME = 1
+OP_CLOSE = 2
+
+class FakeDiscord:
+    """Unix-socket Discord IPC server answering AUTHENTICATE / SET_VOICE_SETTINGS,
+    with VOICE_SETTINGS_UPDATE events for subscribers"""
+
+    def __init__(self, delay=0.0, runtime_dir=None, pipe=0):
+        self.delay = delay  # seconds before each command is answered
+        self.runtime_dir = runtime_dir or tempfile.mkdtemp(prefix="bench-ipc-")
+        self.path = os.path.join(self.runtime_dir, f"discord-ipc-{pipe}")
+        self.voice = {"mute": False, "deaf": False}
+        self.commands = []      # (monotonic time, cmd, args)
+        self.mute_writes = []   # (monotonic time applied, mute)
+        self.subscribers = set()  # writers subscribed to VOICE_SETTINGS_UPDATE
+        self._waiters = []
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        return self.path
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def wait_for_mute(self, mute):
+        """Future resolved with the apply time of the next write of `mute`"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((mute, future))
+        return future
+
+    async def _send(self, writer, op, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(struct.pack("<II", op, len(body)) + body)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(8)
+                op, length = struct.unpack("<II", header)
+                payload = json.loads(await reader.readexactly(length))
+
+                if op == OP_HANDSHAKE:
+                    await self._send(writer, OP_FRAME, {
+                        "cmd": "DISPATCH", "evt": "READY", "nonce": None,
+                        "data": {"v": 1, "config": {}, "user": {"id": "1", "username": "bench"}},
+                    })
+                elif op == OP_CLOSE:
+                    break
+                else:
+                    asyncio.create_task(self._command(writer, payload))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def _command(self, writer, payload):
+        cmd = payload.get("cmd")
+        args = payload.get("args") or {}
+        self.commands.append((time.monotonic(), cmd, args))
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        changed = False
+        if cmd == "AUTHENTICATE":
+            data = {"user": {"id": "1", "username": "bench"}, "scopes": ["rpc"]}
+        elif cmd == "SUBSCRIBE":
+            if payload.get("evt") == "VOICE_SETTINGS_UPDATE":
+                self.subscribers.add(writer)
+            data = {"evt": payload.get("evt")}
+        elif cmd == "SET_VOICE_SETTINGS":
+            before = dict(self.voice)
+            self.voice.update({k: v for k, v in args.items() if k in ("mute", "deaf")})
+            changed = self.voice != before
+            data = dict(self.voice)
+            if "mute" in args:
+                self._applied(args["mute"])
+        elif cmd == "GET_VOICE_SETTINGS":
+            data = dict(self.voice)
+        else:
+            data = {}
+
+        try:
+            await self._send(writer, OP_FRAME, {
+                "cmd": cmd, "evt": None, "nonce": payload.get("nonce"), "data": data,
+            })
+        except ConnectionError:
+            pass
+        if changed:
+            await self._broadcast_voice()
+
+    async def _broadcast_voice(self):
+        """VOICE_SETTINGS_UPDATE to subscribers (Discord only sends real changes)"""
+        for writer in list(self.subscribers):
+            try:
+                await self._send(writer, OP_FRAME, {
+                    "cmd": "DISPATCH", "evt": "VOICE_SETTINGS_UPDATE", "nonce": None,
+                    "data": dict(self.voice),
+                })
+            except ConnectionError:
+                self.subscribers.discard(writer)
+
+    async def user_set_mute(self, mute):
+        """Simulate the user clicking mute in Discord's UI, return the event time"""
+        self.voice["mute"] = mute
+        sent = time.monotonic()
+        await self._broadcast_voice()
+        return sent
+
+    def _applied(self, mute):
+        now = time.monotonic()
+        self.mute_writes.append((now, mute))
+        for waiter in list(self._waiters):
+            value, future = waiter
+            if value == mute and not future.done():
+                future.set_result(now)
+                self._waiters.remove(waiter)
+
+# === Fake OAuth endpoint ===
+
+class FakeOAuth:
+    """Threaded HTTP server answering the OAuth2 token grant"""
+
+    def __init__(self, expires_in=604800):
+        self.expires_in = expires_in
+        self.requests = 0
+        self._server = None
+        self.url = None
+
+    def start(self):
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like discord.com
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.requests += 1
+                body = json.dumps({
+                    "access_token": f"bench-access-{fake.requests}",
+                    "refresh_token": f"bench-refresh-{fake.requests}",
+                    "expires_in": fake.expires_in,
+                    "token_type": "Bearer",
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}/api/oauth2/token"
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+# === Fake output sinks ===
+
+class FakeSink:
+    """Records the mute states a stand-in sink received"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay  # seconds before each send is acknowledged
+        self.mutes = []     # (monotonic time received, mute)
+        self._waiters = []
+        self._server = None
+
+    def wait_for_mute(self, mute):
+        """Future resolved with the receive time of the next send of `mute`"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((mute, future))
+        return future
+
+    def _received(self, mute):
+        now = time.monotonic()
+        self.mutes.append((now, mute))
+        for waiter in list(self._waiters):
+            value, future = waiter
+            if value == mute and not future.done():
+                future.set_result(now)
+                self._waiters.remove(waiter)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+class FakeWebhook(FakeSink):
+    """Keep-alive HTTP server taking JSON POSTs (just enough HTTP/1.1 for requests)"""
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}/hook"
+        return self.url
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = json.loads(await reader.readexactly(length)) if length else {}
+                self._received(body.get("mute"))
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+class FakeOBS(FakeSink):
+    """obs-websocket v5 server answering SetInputMute"""
+
+    def __init__(self, delay=0.0, password=None):
+        super().__init__(delay)
+        self.password = password
+        self.inputs = {}  # input name -> muted
+
+    async def start(self):
+        import websockets
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        return self.url
+
+    async def _handle(self, ws):
+        import base64
+        import hashlib
+        hello = {"obsWebSocketVersion": "5.0.0", "rpcVersion": 1}
+        if self.password:
+            hello["authentication"] = {"challenge": "bench-challenge", "salt": "bench-salt"}
+        await ws.send(json.dumps({"op": 0, "d": hello}))
+        identify = json.loads(await ws.recv())["d"]
+        if self.password:
+            secret = base64.b64encode(hashlib.sha256((self.password + "bench-salt").encode()).digest())
+            expected = base64.b64encode(hashlib.sha256(secret + b"bench-challenge").digest()).decode()
+            if identify.get("authentication") != expected:
+                await ws.close(4009, "Authentication failed")
+                return
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+        try:
+            async for message in ws:
+                request = json.loads(message)["d"]
+                data = request.get("requestData", {})
+                self.inputs[data.get("inputName")] = data.get("inputMuted")
+                self._received(data.get("inputMuted"))
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                await ws.send(json.dumps({"op": 7, "d": {
+                    "requestType": request["requestType"], "requestId": request["requestId"],
+                    "requestStatus": {"result": True, "code": 100},
+                }}))
+        except Exception:
+            pass
+
+class FakeMQTT(FakeSink):
+    """MQTT 3.1.1 broker that takes CONNECT and PUBLISH (QoS 0/1), for a stream light"""
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self.retained = {}  # topic -> payload
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def _read_packet(self, reader):
+        kind = (await reader.readexactly(1))[0]
+        length, shift = 0, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return kind, await reader.readexactly(length)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                kind, body = await self._read_packet(reader)
+                if kind >> 4 == 1:  # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif kind >> 4 == 3:  # PUBLISH
+                    qos = kind >> 1 & 3
+                    size = struct.unpack(">H", body[:2])[0]
+                    topic = body[2:2 + size].decode()
+                    rest = body[2 + size:]
+                    packet_id, payload = (rest[:2], rest[2:]) if qos else (None, rest)
+                    if kind & 1:
+                        self.retained[topic] = payload.decode()
+                    self._received(payload.decode() == "muted")
+                    if qos:
+                        if self.delay:
+                            await asyncio.sleep(self.delay)
+                        writer.write(b"\x40\x02" + packet_id)
+                elif kind >> 4 == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+# === Wiring ===
+
+def configure_app(app, goxlr_url, discord, oauth_url, workdir=None):
+    """Point the app's globals at the stand-ins"""
+    workdir = workdir or tempfile.mkdtemp(prefix="bench-app-")
+    os.environ["XDG_RUNTIME_DIR"] = discord.runtime_dir
+
+    app.GOXLR_WEBSOCKET_URL = goxlr_url
+    app.DISCORD_TOKEN_URL = oauth_url
+    app.TOKEN_FILE = os.path.join(workdir, "discord_token.json")
+    app.LATENCY_FILE = os.path.join(workdir, "latency_stats.json")
+    app.discord_client_id = "100000000000000000"
+    app.client_secret = "bench-secret"
+
+    # An expired token, so the first connect goes through the fake OAuth endpoint
+    app.save_token({"access_token": "expired", "refresh_token": "bench-refresh-0", "expires_at": 1})
+    return workdir
+
+def logon_workdir(prefix="bench-"):
+    """A config directory for a child app process, with a valid saved token as at a normal logon"""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    with open(os.path.join(workdir, "client_id.txt"), "w") as f:
+        f.write("100000000000000000")
+    with open(os.path.join(workdir, "client_secret.txt"), "w") as f:
+        f.write("bench-secret")
+    # No OAuth on the way up
+    with open(os.path.join(workdir, "discord_token.json"), "w") as f:
+        json.dump({"access_token": "bench-token", "refresh_token": "bench-refresh",
+                   "expires_at": 4102444800}, f)
+    return workdir
+
+class SlowTray:
+    """Stand-in for a pystray icon whose backend takes delay seconds per change"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.renders = 0
+        self._icon = None
+        self.title = None
+
+    @property
+    def icon(self):
+        return self._icon
+
+    @icon.setter
+    def icon(self, value):
+        time.sleep(self.delay)
+        self.renders += 1
+        self._icon = value
+
+def app_synced(app):
+    """Both sides connected and Discord holds every desired setting"""
+    return (app.discord_ready.is_set() and app.goxlr_ready.is_set()
+            and app.desired_voice is not None and not app.desired_voice.pending)
+
+def percentiles(samples):
+    """Exact summary of a list of durations, in milliseconds"""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean": sum(ordered) / len(ordered) * 1000,
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": ordered[-1] * 1000,
+    }
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def write_results(results, output=None):
+    """Print results as JSON, and save them if an output path is given"""
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+def check_regression(results, baseline_file, checks, tolerance):
+    """Compare results to a saved baseline.
+
+    checks is a list of (label, getter, higher_is_better). Returns the list
+    of failures; a metric fails when it is worse than baseline by more than
+    tolerance (fraction).
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    failures = []
+    for label, getter, higher_is_better in checks:
+        try:
+            old, new = getter(baseline), getter(results)
+        except (KeyError, TypeError):
+            continue
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            failures.append(f"{label}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+    return failures
+
+class Quiet:
+    """Silence the app's console output while a benchmark runs"""
+
+    def __enter__(self):
+        self._stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout = self._stdout
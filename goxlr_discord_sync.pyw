@@ -4,25 +4,39 @@ Uses Discord RPC API with local OAuth2 (async version)
 Auto-reconnects if Discord or GoXLR restarts
 """
 
+import time
+MODULE_START = time.perf_counter()  # for the startup profile
+
 import asyncio
+import copy
+import io
 import json
+import logging
 import sys
 import os
-import webbrowser
 import urllib.parse
-import http.server
+from collections import deque
+
+class DiscardOutput(io.TextIOBase):
+    """A stdout that drops everything (see the --windowed fix below)"""
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return len(s)
 
 # Fix for PyInstaller --windowed mode
-# Only redirect if truly None, don't open devnull which can cause slowdowns
+# Only redirect if truly None, don't open devnull which can cause slowdowns.
+# Output is dropped rather than kept in a StringIO, the app runs for weeks:
+# the log ring buffer (see Logging) is what the tray shows instead
+HAS_CONSOLE = sys.stdout is not None
 if sys.stdin is None:
-    import io
     sys.stdin = io.StringIO()
 if sys.stdout is None:
-    import io
-    sys.stdout = io.StringIO()
+    sys.stdout = DiscardOutput()
 if sys.stderr is None:
-    import io
-    sys.stderr = io.StringIO()
+    sys.stderr = DiscardOutput()
 
 # === Configuration files ===
 # Detect if running as compiled exe or script
@@ -36,40 +50,175 @@ else:
 CLIENT_ID_FILE = os.path.join(SCRIPT_DIR, "client_id.txt")
 SECRET_FILE = os.path.join(SCRIPT_DIR, "client_secret.txt")
 TOKEN_FILE = os.path.join(SCRIPT_DIR, "discord_token.json")
+LATENCY_FILE = os.path.join(SCRIPT_DIR, "latency_stats.json")
+LOG_FILE = os.path.join(SCRIPT_DIR, "goxlr_discord_sync.log")
+LOG_VIEW_FILE = os.path.join(SCRIPT_DIR, "recent_log.txt")
+STARTUP_PROFILE_FILE = os.path.join(SCRIPT_DIR, "startup_profile.json")
+CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
 
 # === GoXLR Configuration ===
 GOXLR_WEBSOCKET_URL = "ws://localhost:14564/api/websocket"
+GOXLR_REQUEST_TIMEOUT = 5  # seconds to wait for the reply to a request
 REDIRECT_PORT = 9543
 
+# === Discord IPC ===
+DISCORD_SETUP_TIMEOUT = 5    # seconds per command while connecting (AUTHENTICATE, SUBSCRIBE...);
+                             # calls after that use discord_command_timeout
+DISCORD_CONNECT_TIMEOUT = 5  # seconds to open the socket and get READY
+
+# === Discord OAuth endpoint ===
+DISCORD_TOKEN_URL = "https://discord.com/api/oauth2/token"
+OAUTH_TIMEOUT = (5, 10)  # seconds (connect, read) per token request
+OAUTH_CALLBACK_TIMEOUT = 300  # seconds to wait for the user in the browser
+OAUTH_CLIENT_TIMEOUT = 10     # seconds a browser connection may take to send its request
+TOKEN_REFRESH_MARGIN = 3600  # refresh this many seconds before expiry
+TOKEN_REFRESH_RETRY = 60     # seconds between failed background refreshes
+
+# === Output sinks (defaults, each sink can override them in config.json) ===
+SINK_TIMEOUT = 2       # seconds per send
+SINK_RETRIES = 2       # quick retries before a sink is reported as down
+SINK_RETRY_DELAY = 30  # seconds between retries of a sink that is down (max)
+
+# === Optional settings (config.json) ===
+MIXER_POLICIES = ("latest", "any", "all")
+DEFAULT_CONFIG = {
+    # Which GoXLR serials drive Discord mute (empty = every mixer)
+    "discord_mixers": [],
+    # How several driving mixers combine:
+    #   latest - the mixer whose cough button changed last decides
+    #   any    - Discord is muted while any of them is muted
+    #   all    - Discord is muted only while all of them are muted
+    "mixer_policy": "latest",
+    # Keep a full copy of the GoXLR state up to date (decodes every frame,
+    # fader traffic included; nothing built in needs it)
+    "state_mirror": False,
+    # Extra GoXLR path → Discord mappings, see RuleEngine
+    "rules": [],
+    # Mute/unmute from Discord also sets the GoXLR cough button
+    "discord_to_goxlr": True,
+    # Seconds between Discord liveness checks, and how long each may take
+    "discord_probe_interval": 5,
+    "discord_probe_timeout": 2,
+    # Seconds any other Discord RPC call (mute writes...) may take before the
+    # client is treated as frozen and reconnected in the background
+    "discord_command_timeout": 2,
+    # "debug" also logs every press and Discord write (quiet at "info")
+    "log_level": "info",
+    # Also log to a file: true for goxlr_discord_sync.log next to the app, or a path
+    "log_file": False,
+    # Size cap per log file, and how many old files to keep
+    "log_file_max_kb": 1024,
+    "log_file_backups": 3,
+    # Also send the voice state to OBS, webhooks or MQTT, see OutputSink
+    "sinks": [],
+}
+
 # === Reconnection delays ===
+# Retries back off exponentially (with jitter) from RETRY_MIN_DELAY up to these
+RETRY_MIN_DELAY = 0.5     # seconds
 DISCORD_RETRY_DELAY = 10  # seconds
 GOXLR_RETRY_DELAY = 5     # seconds
 
+# === Logging ===
+LOG_BUFFER_LINES = 1000  # recent lines kept for the tray's log view
+LOG_LINE_MAX = 500       # characters per kept line (long errors get cut)
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(message)s"
+
+log = logging.getLogger("goxlr_discord_sync")
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last few formatted log lines in memory, whatever the uptime"""
+
+    def __init__(self, capacity=LOG_BUFFER_LINES):
+        super().__init__()
+        self.lines = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(LOG_FORMAT, "%Y-%m-%d %H:%M:%S"))
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(line) > LOG_LINE_MAX:
+            line = line[:LOG_LINE_MAX] + "..."
+        self.lines.append(line)
+
+    def tail(self, count=None):
+        """The last count lines (all kept lines by default), oldest first"""
+        with self.lock:  # emit() holds it too, so no append mid-copy
+            lines = list(self.lines)
+        return lines[-count:] if count else lines
+
+log_buffer = RingBufferHandler()
+log_file_handler = None
+
+def setup_logging():
+    """Log to the ring buffer, and to the console if there is one"""
+    log.handlers[:] = [log_buffer]
+    if HAS_CONSOLE:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(console)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+def apply_log_config():
+    """Set the level and the optional rotating file from config.json"""
+    global log_file_handler
+
+    level = str(config["log_level"]).upper()
+    if level not in ("DEBUG", "INFO", "WARNING", "ERROR"):
+        log.warning(f"Unknown log_level '{config['log_level']}', using 'info'")
+        level = "INFO"
+    log.setLevel(level)
+
+    if log_file_handler:
+        log.removeHandler(log_file_handler)
+        log_file_handler.close()
+        log_file_handler = None
+    if config["log_file"]:
+        from logging.handlers import RotatingFileHandler
+
+        path = LOG_FILE if config["log_file"] is True else config["log_file"]
+        try:
+            log_file_handler = RotatingFileHandler(
+                path, maxBytes=int(config["log_file_max_kb"]) * 1024,
+                backupCount=int(config["log_file_backups"]), encoding="utf-8", delay=True)
+        except Exception as e:
+            log.error(f"Can't log to {path}: {e}")
+            return
+        log_file_handler.setFormatter(log_buffer.formatter)
+        log.addHandler(log_file_handler)
+
 # === Global variables ===
 discord_client_id = None
 client_secret = None
-discord_rpc = None
-is_muted = False
+discord_links = {}          # IPC path → DiscordLink, one per running Discord client
+goxlr_conn = None           # GoXLRConnection while the websocket is up
+goxlr_mixers = None         # MixerTracker of the current GoXLR connection
+desired_voice = None        # DesiredState the Discord writer reconciles towards
+config = dict(DEFAULT_CONFIG)
+token_client = None
+token_lock = None  # asyncio.Lock, so only one refresh/authorization runs at once
 tray_icon = None
 app_running = True
-status_text = "Initializing..."
-cached_icons = {}  # Cache for icon images
+cached_icons = {}  # Cache for icon images (tray worker thread only)
+
+# Counters for the GoXLR → Discord hand-off (see DesiredState)
+sync_stats = {
+    "events": 0,        # cough changes read from GoXLR
+    "coalesced": 0,     # changes replaced by a newer one before Discord saw them
+    "writes": 0,        # set_voice_settings calls made
+    "writes_saved": 0,  # writes skipped because Discord already had the settings
+    "last_lag": 0.0,    # seconds the last write waited behind the reader
+    "max_lag": 0.0,     # worst wait seen so far
+    "frames": 0,        # websocket frames received from GoXLR
+    "frames_skipped": 0,  # frames dropped by the pre-filter without decoding
+    "missed": 0,        # relevant changes made while GoXLR Utility was away
+}
 
 # === Imports ===
-try:
-    from pypresence import AioClient as DiscordClient
-except ImportError:
-    print("ERROR: Module 'pypresence' missing.")
-    print("Install it with: pip install pypresence")
-    sys.exit(1)
-
-try:
-    import requests
-except ImportError:
-    print("ERROR: Module 'requests' missing.")
-    print("Install it with: pip install requests")
-    sys.exit(1)
-
 try:
     import websockets
 except ImportError:
@@ -77,112 +226,495 @@ except ImportError:
     print("Install it with: pip install websockets")
     sys.exit(1)
 
+# Run with --headless for a service without tray icon (no GUI modules at all)
+HEADLESS = "--headless" in sys.argv
+
+# requests (OAuth only), pystray and Pillow (tray thread) load on first use,
+# they're slow to import and the first sync doesn't need them. Check they
+# are installed without importing them, so a missing one still fails here.
+from importlib.util import find_spec
+
+REQUIRED_MODULES = [("requests", "requests")]
+if not HEADLESS:
+    REQUIRED_MODULES += [("pystray", "pystray Pillow"), ("PIL", "pystray Pillow")]
+
+for module, install in REQUIRED_MODULES:
+    if find_spec(module) is None:
+        print(f"ERROR: Module '{module}' missing.")
+        print(f"Install it with: pip install {install}")
+        sys.exit(1)
+
+import base64
+import hashlib
+import math
+import random
+import signal
+import struct
+import threading
+from collections import namedtuple
+
+# Optional faster JSON decoder for GoXLR frames
 try:
-    import pystray
-    from PIL import Image, ImageDraw
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
 except ImportError:
-    print("ERROR: Modules 'pystray' or 'Pillow' missing.")
-    print("Install them with: pip install pystray Pillow")
-    sys.exit(1)
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+# === Latency tracing ===
+
+# Stages of a cough event, in the order they happen
+TRACE_STAGES = (
+    "parse",     # json.loads of the frame
+    "match",     # scanning the patch list for cough_button/state and rule paths
+    "handoff",   # DesiredState.put, including publishing to the output sinks
+    "queue",     # waiting in DesiredState for the Discord writer
+    "tray",      # tray icon update
+    "discord",   # set_voice_settings round trip
+    "e2e",       # frame received → Discord acknowledged
+    "discord_to_goxlr",  # Discord mute event → GoXLR confirms the cough state
+    "detect",    # last good Discord reply → dead connection noticed
+    "converge",  # desired voice settings changed → Discord has all of them
+)
+
+class LatencyHistogram:
+    """Fixed-memory log-scale histogram of durations (seconds).
+
+    Buckets grow by 10% from 10µs to ~100s, so percentiles are accurate to
+    about 10% and memory never grows no matter how many events are recorded.
+    """
+
+    MIN = 1e-5
+    GROWTH = 1.1
+    BUCKETS = 170
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= self.MIN:
+            index = 0
+        else:
+            index = min(self.BUCKETS - 1, math.ceil(math.log(seconds / self.MIN, self.GROWTH)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile (0 if empty)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.max, self.MIN * self.GROWTH ** index)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+latency = {stage: LatencyHistogram() for stage in TRACE_STAGES}
+
+def record_span(stage, start, end=None):
+    """Record a monotonic-clock span for a stage, return its end time"""
+    if end is None:
+        end = time.monotonic()
+    latency[stage].record(end - start)
+    return end
+
+def latency_report():
+    """Summary (seconds) for every stage, keyed by stage name"""
+    return {stage: hist.summary() for stage, hist in latency.items()}
+
+def format_latency(stages=TRACE_STAGES):
+    """Human-readable latency lines, one per stage with data"""
+    lines = []
+    for stage in stages:
+        hist = latency[stage]
+        if hist.count:
+            lines.append(
+                f"{stage}: p50 {hist.percentile(50) * 1000:.1f}ms"
+                f" / p95 {hist.percentile(95) * 1000:.1f}ms"
+                f" / p99 {hist.percentile(99) * 1000:.1f}ms (n={hist.count})"
+            )
+    return lines
 
-import threading
+def dump_latency():
+    """Write the latency report to LATENCY_FILE and print it"""
+    report = {"stages": latency_report(), "sync": dict(sync_stats), "health": dict(health_stats),
+              "startup": dict(startup_profile)}
+    with open(LATENCY_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
 
-# === System Tray Functions ===
+    log.info("Latency (per stage):")
+    for line in format_latency():
+        log.info(f"  {line}")
+    log.info(f"Saved to {LATENCY_FILE}")
+    return report
 
-def create_icon_image(color):
-    """Create a simple colored circle icon (cached)"""
-    global cached_icons
-
-    # Return cached version if exists
-    if color in cached_icons:
-        return cached_icons[color]
-
-    size = 64
-    image = Image.new('RGB', (size, size), color='black')
-    draw = ImageDraw.Draw(image)
-
-    # Draw circle
-    margin = 8
-    draw.ellipse(
-        [margin, margin, size - margin, size - margin],
-        fill=color,
-        outline='white',
-        width=2
-    )
+# === Startup profile ===
 
-    # Cache the image
-    cached_icons[color] = image
-    return image
+# Run with --profile-startup to print where startup time goes and exit
+PROFILE_STARTUP = "--profile-startup" in sys.argv
 
-def update_tray_icon():
-    """Update tray icon based on current state (thread-safe)"""
-    global tray_icon, is_muted
+startup_profile = {}  # milestone -> seconds since the module started loading
+first_sync_done = asyncio.Event()
 
-    if tray_icon:
-        def _update():
-            try:
-                # Green = unmuted, Red = muted
-                color = 'red' if is_muted else 'green'
-                tray_icon.icon = create_icon_image(color)
+def process_uptime():
+    """Seconds since this process started, None if the OS won't say"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            created, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(created),
+                                     ctypes.byref(exited), ctypes.byref(kernel), ctypes.byref(user))
+            # FILETIME counts 100ns steps since 1601
+            started = (created.dwHighDateTime << 32 | created.dwLowDateTime) / 1e7 - 11644473600
+            return time.time() - started
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
 
-                # Update title (tooltip)
-                status = "Muted" if is_muted else "Unmuted"
-                tray_icon.title = f"GoXLR Discord Sync - {status}"
-            except Exception as e:
-                print(f"Error updating tray icon: {e}")
+def mark_startup(milestone):
+    """Remember when a startup milestone was first reached"""
+    if milestone in startup_profile:
+        return
+    startup_profile[milestone] = time.perf_counter() - MODULE_START
+    if milestone == "first_sync":
+        first_sync_done.set()
+        if PROFILE_STARTUP:
+            report_startup()
+
+def report_startup():
+    """Print the startup profile and save it to STARTUP_PROFILE_FILE"""
+    uptime = process_uptime()
+    # Interpreter start (and unpacking, for the exe) before our first line ran
+    before_module = uptime - (time.perf_counter() - MODULE_START) if uptime is not None else None
+    report = {"before_module": before_module, "milestones": dict(startup_profile)}
+    if before_module is not None and "first_sync" in startup_profile:
+        report["process_start_to_first_sync"] = before_module + startup_profile["first_sync"]
+
+    log.info("Startup profile (seconds since the module started loading):")
+    if before_module is not None:
+        log.info(f"  {'process start':<18} {-before_module:+.3f}")
+    previous = 0.0
+    for milestone, at in sorted(startup_profile.items(), key=lambda item: item[1]):
+        log.info(f"  {milestone:<18} {at:.3f}  (+{at - previous:.3f})")
+        previous = at
+    if "process_start_to_first_sync" in report:
+        log.info(f"  Process start → first sync: {report['process_start_to_first_sync']:.3f}s")
+
+    try:
+        with open(STARTUP_PROFILE_FILE, 'w') as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        log.error(f"Error saving startup profile: {e}")
+    return report
+
+mark_startup("imports")
+
+# === Shared app state ===
+
+# What the user sees: an immutable snapshot, replaced as a whole on change
+AppSnapshot = namedtuple("AppSnapshot", "muted status tray")
+
+class AppState:
+    """Mute and status shared between the event loop and the tray thread.
+
+    update() swaps in a new AppSnapshot under a lock and never blocks on
+    the tray. Readers get whole snapshots, never a half-updated mix.
+    """
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._snapshot = AppSnapshot(muted=False, status="Initializing...", tray="starting")
+        self._version = 0
 
-        # Run in tray icon's thread
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def update(self, **changes):
+        with self._lock:
+            snapshot = self._snapshot._replace(**changes)
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                self._version += 1
+                self._lock.notify_all()
+        return snapshot
+
+    def wait_newer(self, version, timeout=None):
+        """Wait for a snapshot newer than version, return (snapshot, version)"""
+        with self._lock:
+            self._lock.wait_for(lambda: self._version != version, timeout)
+            return self._snapshot, self._version
+
+app_state = AppState()
+
+# === System Tray Functions ===
+
+# Pre-rendered 64x64 PNGs, a coloured circle on black for each tray state
+# (starting = orange, muted = red, unmuted = green, error = gray,
+# degraded = gold). Decoded only on first use, so more states cost nothing
+# at startup.
+TRAY_ICON_PNGS = {
+    "starting": (
+        "iVBORw0KGgoAAAANSUhEUgAAAEAAAABAAgMAAADXB5lNAAAACVBMVEX/////pQAAAAAiUhJ3"
+        "AAAA+UlEQVR42sWTMYoCMRSGvwQXxGKZwq2dUjzAYiUewUbrPYiwETzI1tp4BLESDyCWY62F"
+        "bLEIKzNbzHtJFlLZTJrwf/y8/O8lMSv+L0sjoCX7jIGLHTM4usjxw5TLLnJ8TOFt5DwoXwC6"
+        "hQenCYB592BRV86cgFLObhUC7pMamKGAQlOWAoyCTMDS9+HAQpkpMEW6/fvYq2HacQ7q9dkh"
+        "L6MJu6buNgXmQT2eDdYL6jvtaG+92qcd9qaiymvHPMqFBSoFN8mRx6Es0N5Iib3Ch5TINfqn"
+        "lNBHR38DUB18c/YX4JqHbr/WcNm58Pg7rGEQz2OF/hfTzEf+A+HCNLDcO3LTAAAAAElFTkSu"
+        "QmCC"
+    ),
+    "muted": (
+        "iVBORw0KGgoAAAANSUhEUgAAAEAAAABAAgMAAADXB5lNAAAACVBMVEX/////AAAAAACalQKR"
+        "AAAA+UlEQVR42sWTMYoCMRSGvwQXxGKZwq2dUjzAYiUewUbrPYiwETzI1tp4BLESDyCWY62F"
+        "bLEIKzNbzHtJFlLZTJrwf/y8/O8lMSv+L0sjoCX7jIGLHTM4usjxw5TLLnJ8TOFt5DwoXwC6"
+        "hQenCYB592BRV86cgFLObhUC7pMamKGAQlOWAoyCTMDS9+HAQpkpMEW6/fvYq2HacQ7q9dkh"
+        "L6MJu6buNgXmQT2eDdYL6jvtaG+92qcd9qaiymvHPMqFBSoFN8mRx6Es0N5Iib3Ch5TINfqn"
+        "lNBHR38DUB18c/YX4JqHbr/WcNm58Pg7rGEQz2OF/hfTzEf+A+HCNLDcO3LTAAAAAElFTkSu"
+        "QmCC"
+    ),
+    "unmuted": (
+        "iVBORw0KGgoAAAANSUhEUgAAAEAAAABAAgMAAADXB5lNAAAACVBMVEX///8AgAAAAADPtxnP"
+        "AAAA+UlEQVR42sWTMYoCMRSGvwQXxGKZwq2dUjzAYiUewUbrPYiwETzI1tp4BLESDyCWY62F"
+        "bLEIKzNbzHtJFlLZTJrwf/y8/O8lMSv+L0sjoCX7jIGLHTM4usjxw5TLLnJ8TOFt5DwoXwC6"
+        "hQenCYB592BRV86cgFLObhUC7pMamKGAQlOWAoyCTMDS9+HAQpkpMEW6/fvYq2HacQ7q9dkh"
+        "L6MJu6buNgXmQT2eDdYL6jvtaG+92qcd9qaiymvHPMqFBSoFN8mRx6Es0N5Iib3Ch5TINfqn"
+        "lNBHR38DUB18c/YX4JqHbr/WcNm58Pg7rGEQz2OF/hfTzEf+A+HCNLDcO3LTAAAAAElFTkSu"
+        "QmCC"
+    ),
+    "error": (
+        "iVBORw0KGgoAAAANSUhEUgAAAEAAAABAAgMAAADXB5lNAAAACVBMVEX///+AgIAAAAA8Xrss"
+        "AAAA+UlEQVR42sWTMYoCMRSGvwQXxGKZwq2dUjzAYiUewUbrPYiwETzI1tp4BLESDyCWY62F"
+        "bLEIKzNbzHtJFlLZTJrwf/y8/O8lMSv+L0sjoCX7jIGLHTM4usjxw5TLLnJ8TOFt5DwoXwC6"
+        "hQenCYB592BRV86cgFLObhUC7pMamKGAQlOWAoyCTMDS9+HAQpkpMEW6/fvYq2HacQ7q9dkh"
+        "L6MJu6buNgXmQT2eDdYL6jvtaG+92qcd9qaiymvHPMqFBSoFN8mRx6Es0N5Iib3Ch5TINfqn"
+        "lNBHR38DUB18c/YX4JqHbr/WcNm58Pg7rGEQz2OF/hfTzEf+A+HCNLDcO3LTAAAAAElFTkSu"
+        "QmCC"
+    ),
+    "degraded": (
+        "iVBORw0KGgoAAAANSUhEUgAAAEAAAABAAgMAAADXB5lNAAAACVBMVEX/////1wAAAAChQKHY"
+        "AAAA+UlEQVR42sWTMYoCMRSGvwQXxGKZwq2dUjzAYiUewUbrPYiwETzI1tp4BLESDyCWY62F"
+        "bLEIKzNbzHtJFlLZTJrwf/y8/O8lMSv+L0sjoCX7jIGLHTM4usjxw5TLLnJ8TOFt5DwoXwC6"
+        "hQenCYB592BRV86cgFLObhUC7pMamKGAQlOWAoyCTMDS9+HAQpkpMEW6/fvYq2HacQ7q9dkh"
+        "L6MJu6buNgXmQT2eDdYL6jvtaG+92qcd9qaiymvHPMqFBSoFN8mRx6Es0N5Iib3Ch5TINfqn"
+        "lNBHR38DUB18c/YX4JqHbr/WcNm58Pg7rGEQz2OF/hfTzEf+A+HCNLDcO3LTAAAAAElFTkSu"
+        "QmCC"
+    ),
+}
+
+# A frozen Discord shows the same gold icon, with its own title
+TRAY_ICON_PNGS["stalled"] = TRAY_ICON_PNGS["degraded"]
+TRAY_ICON_PNGS["partial"] = TRAY_ICON_PNGS["degraded"]
+
+TRAY_TITLES = {
+    "starting": "Starting...",
+    "muted": "Muted",
+    "unmuted": "Unmuted",
+    "error": "Reconnecting...",
+    "degraded": "Discord → GoXLR sync unavailable",
+    "stalled": "Discord not responding - reconnecting...",
+    "partial": "A Discord client is not responding - reconnecting it...",
+}
+
+class TrayIconImage:
+    """A pre-rendered tray icon.
+
+    pystray's Windows and GTK backends only ever call save(file, format) on
+    the icon, so the PNG is written out as is (wrapped in an ICO header for
+    Windows) and Pillow never loads. to_pil() is for the backends that need
+    a real Pillow image.
+    """
+
+    def __init__(self, png):
+        self.png = png
+
+    def save(self, f, format="PNG", **params):
+        if format.upper() == "ICO":
+            f.write(png_to_ico(self.png))
+        else:
+            f.write(self.png)
+
+    def to_pil(self):
+        from PIL import Image
+        return Image.open(io.BytesIO(self.png))
+
+def png_to_ico(png):
+    """Wrap PNG data in a one-image ICO file (Windows Vista+ reads PNG icons)"""
+    width, height = struct.unpack(">II", png[16:24])  # from the IHDR chunk
+    header = struct.pack("<HHH", 0, 1, 1)
+    entry = struct.pack("<BBBBHHII", width % 256, height % 256, 0, 0, 1, 32, len(png), 6 + 16)
+    return header + entry + png
+
+tray_icon_needs_pil = False  # set by run_tray_icon for the X11 and macOS backends
+
+def get_tray_icon_image(state):
+    """Icon for a tray state (cached)"""
+    if state not in cached_icons:
+        image = TrayIconImage(base64.b64decode(TRAY_ICON_PNGS[state]))
+        cached_icons[state] = image.to_pil() if tray_icon_needs_pil else image
+    return cached_icons[state]
+
+def tray_state():
+    """Which icon the tray should show right now"""
+    if discord_stalled and not discord_links and goxlr_ready.is_set():
+        return "stalled"  # every Discord client froze, reconnecting in the background
+    if discord_ready.is_set() and goxlr_ready.is_set():
+        if discord_stalled:
+            return "partial"  # the others are still kept in sync
+        if not all(link.voice_live for link in discord_links.values()):
+            return "degraded"
+        return "muted" if app_state.snapshot().muted else "unmuted"
+    # Until everything has come up once, not being connected is expected
+    return "error" if health_stats["ready_after"] is not None else "starting"
+
+def update_tray_icon():
+    """Hand the current state to the tray worker (never blocks on the tray)"""
+    app_state.update(tray=tray_state())
+
+def tray_worker():
+    """Render app state snapshots on the tray, latest only (own thread)"""
+    shown = None
+    version = 0
+    while app_running:
+        snapshot, version = app_state.wait_newer(version, timeout=1)
+        # Snapshots that arrived while we were rendering are simply skipped
+        if snapshot.tray == shown or tray_icon is None:
+            continue
         try:
-            _update()
-        except:
-            pass
+            tray_icon.icon = get_tray_icon_image(snapshot.tray)
+            tray_icon.title = f"GoXLR Discord Sync - {TRAY_TITLES[snapshot.tray]}"
+            shown = snapshot.tray
+        except Exception as e:
+            log.error(f"Error updating tray icon: {e}")
 
 def on_quit(icon, item):
     """Quit the application"""
     global app_running
-    print("\nShutting down...")
+    log.info("Shutting down...")
     app_running = False
     icon.stop()
-    # Force exit
-    os._exit(0)
+    if not request_shutdown():
+        # Still in setup (first-time prompts): nothing to stop cleanly
+        os._exit(0)
 
 def on_show_status(icon, item):
     """Show current status notification"""
-    global status_text, is_muted, tray_icon
-    status = "🔇 Muted" if is_muted else "🔊 Unmuted"
+    snapshot = app_state.snapshot()
+    status = "🔇 Muted" if snapshot.muted else "🔊 Unmuted"
+
+    # Keep it short, notifications get truncated
+    timings = "\n".join(format_latency(("discord", "e2e", "discord_to_goxlr", "converge")))
+    if health_stats["rpc_timeouts"]:
+        timings += (f"\nDiscord calls: {health_stats['rpc_ok']} ok, "
+                    f"{health_stats['rpc_timeouts']} timed out")
+    down = [sink.name for sink in output_sinks if sink.healthy is False]
+    if down:
+        timings += f"\nNot responding: {', '.join(down)}"
+    if len(discord_links) > 1:
+        timings += f"\nSyncing {len(discord_links)} Discord clients"
+    if health_stats["last_detect"] is not None:
+        timings += f"\nLast Discord failure noticed after {health_stats['last_detect']:.1f}s"
 
     if tray_icon:
         tray_icon.notify(
             title="GoXLR Discord Sync",
-            message=f"{status}\n{status_text}"
+            message=f"{status}\n{snapshot.status}\n{timings}".rstrip()
         )
 
+def on_dump_latency(icon, item):
+    """Write latency percentiles to latency_stats.json"""
+    try:
+        dump_latency()
+        icon.notify(title="GoXLR Discord Sync", message=f"Latency saved to {LATENCY_FILE}")
+    except Exception as e:
+        log.error(f"Error dumping latency: {e}")
+
+def open_file(path):
+    """Open a file with the desktop's default app"""
+    if sys.platform == "win32":
+        os.startfile(path)
+    else:
+        import subprocess
+        subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", path])
+
+def on_show_log(icon, item):
+    """Open the recent log lines (the in-memory ring buffer) in a text viewer"""
+    try:
+        with open(LOG_VIEW_FILE, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_buffer.tail()) + "\n")
+        open_file(LOG_VIEW_FILE)
+    except Exception as e:
+        log.error(f"Error showing log: {e}")
+
 def setup_tray_icon():
-    """Setup system tray icon"""
-    global tray_icon
+    """Setup system tray icon (loads in its own thread, startup doesn't wait)"""
+    threading.Thread(target=run_tray_icon, daemon=True).start()
+
+def run_tray_icon():
+    """Build the tray icon and run its event loop"""
+    global tray_icon, tray_icon_needs_pil
+
+    import pystray
+    tray_icon_needs_pil = pystray.Icon.__module__.rsplit(".", 1)[-1] in ("_xorg", "_darwin")
 
     # Create menu
     menu = pystray.Menu(
         pystray.MenuItem("Status", on_show_status),
+        pystray.MenuItem("Show log", on_show_log),
+        pystray.MenuItem("Dump latency stats", on_dump_latency),
         pystray.MenuItem("Quit", on_quit)
     )
 
     # Create icon
-    icon_image = create_icon_image('orange')  # Orange = starting
+    icon_image = get_tray_icon_image("starting")
     tray_icon = pystray.Icon(
         "goxlr_sync",
         icon_image,
         "GoXLR Discord Sync - Starting...",
         menu
     )
+    mark_startup("tray")
 
-    # Run in thread
-    threading.Thread(target=tray_icon.run, daemon=True).start()
+    # Icon changes are rendered here, off the event loop
+    threading.Thread(target=tray_worker, daemon=True).start()
+    tray_icon.run()
 
 def save_token(token_data):
-    """Save token for future sessions"""
-    with open(TOKEN_FILE, 'w') as f:
+    """Save token for future sessions (atomic: a crash never leaves half a file)"""
+    # Store an absolute expiry so we know later whether it is still valid
+    if 'expires_in' in token_data and 'expires_at' not in token_data:
+        token_data = dict(token_data)
+        token_data['expires_at'] = time.time() + token_data['expires_in']
+
+    tmp_file = TOKEN_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
         json.dump(token_data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, TOKEN_FILE)
 
 def load_token():
     """Load saved token"""
@@ -192,10 +724,79 @@ def load_token():
     except:
         return None
 
+def token_time_left(token_data):
+    """Seconds until the saved access token expires (0 if unknown or expired)"""
+    expires_at = token_data.get('expires_at') if token_data else None
+    if not expires_at:
+        return 0
+    return max(0, expires_at - time.time())
+
 def get_redirect_uri():
     return f"http://127.0.0.1:{REDIRECT_PORT}/callback"
 
-def exchange_code_for_token(code):
+class TokenClient:
+    """Async client for the Discord OAuth token endpoint.
+
+    Keeps one requests.Session (and so one keep-alive connection pool) for the
+    whole process. Each request runs in a worker thread with its own timeout,
+    so a slow discord.com never blocks GoXLR patch handling on the event loop.
+    """
+
+    def __init__(self, token_url=None, timeout=OAUTH_TIMEOUT):
+        self.token_url = token_url or DISCORD_TOKEN_URL
+        self.timeout = timeout
+        self._session = None
+        self._lock = asyncio.Lock()  # requests.Session isn't thread-safe
+        self.last_status = None      # HTTP status of the last reply (None: no reply)
+
+    def _get_session(self):
+        if self._session is None:
+            import requests  # first use is in the worker thread, off the event loop
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+            self._session.headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        return self._session
+
+    def _post(self, data):
+        return self._get_session().post(self.token_url, data=data, timeout=self.timeout)
+
+    async def request_token(self, data):
+        """POST a grant to the token endpoint, return the JSON reply or None"""
+        self.last_status = None
+        try:
+            async with self._lock:
+                response = await asyncio.to_thread(self._post, data)
+        except OSError as e:  # requests' errors are all OSErrors
+            log.warning(f"Token endpoint error: {e}")
+            return None
+
+        self.last_status = response.status_code
+        if response.status_code == 200:
+            try:
+                return response.json()
+            except ValueError:
+                # A proxy or captive portal may answer 200 with an HTML page
+                log.warning(f"Token endpoint sent no JSON: {response.text[:200]}")
+                return None
+
+        log.warning(f"Token request error: {response.status_code} - {response.text}")
+        return None
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+def get_token_client():
+    """Return the shared token client, creating it on first use"""
+    global token_client
+    if token_client is None:
+        token_client = TokenClient()
+    return token_client
+
+async def exchange_code_for_token(code):
     """Exchange authorization code for access token"""
     data = {
         'client_id': discord_client_id,
@@ -204,20 +805,10 @@ def exchange_code_for_token(code):
         'code': code,
         'redirect_uri': get_redirect_uri()
     }
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
-    response = requests.post('https://discord.com/api/oauth2/token', data=data, headers=headers)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Token exchange error: {response.status_code} - {response.text}")
-        return None
 
-def refresh_access_token(refresh_tok):
+    return await get_token_client().request_token(data)
+
+async def refresh_access_token(refresh_tok):
     """Refresh an expired access token"""
     data = {
         'client_id': discord_client_id,
@@ -225,77 +816,91 @@ def refresh_access_token(refresh_tok):
         'grant_type': 'refresh_token',
         'refresh_token': refresh_tok
     }
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
-    response = requests.post('https://discord.com/api/oauth2/token', data=data, headers=headers)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return None
 
-class OAuthHandler(http.server.BaseHTTPRequestHandler):
-    """Handler to receive OAuth callback"""
-    auth_code = None
-    
-    def do_GET(self):
-        if self.path.startswith('/callback'):
-            query = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(query)
-            
-            if 'code' in params:
-                OAuthHandler.auth_code = params['code'][0]
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(b"""
-                <html><body style="font-family: Arial; text-align: center; padding-top: 50px;">
-                <h1>Authorization successful!</h1>
-                <p>You can close this window and return to the script.</p>
-                </body></html>
-                """)
+    return await get_token_client().request_token(data)
+
+OAUTH_PAGE = b"""
+<html><body style="font-family: Arial; text-align: center; padding-top: 50px;">
+<h1>Authorization successful!</h1>
+<p>You can close this window and return to the script.</p>
+</body></html>
+"""
+
+def http_response(status, body=b""):
+    """A complete HTTP/1.1 response that closes the connection"""
+    return (f"HTTP/1.1 {status}\r\nContent-Type: text/html\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+async def get_authorization_code(timeout=OAUTH_CALLBACK_TIMEOUT):
+    """Open browser for authorization and wait for the code on the redirect URI.
+
+    The callback listener runs on the event loop, so GoXLR keeps syncing
+    meanwhile. Returns None if the user declines or nothing arrives within
+    timeout seconds; the port is released as soon as this returns (or is
+    cancelled).
+    """
+    import webbrowser
+
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+    clients = set()
+
+    async def handle(reader, writer):
+        clients.add(writer)
+        try:
+            # Browsers also open idle speculative connections, don't wait on those forever
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), OAUTH_CLIENT_TIMEOUT)
+            path = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")[1]
+            if not path.startswith("/callback"):
+                writer.write(http_response("404 Not Found"))
+                return
+            params = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+            if "code" in params:
+                writer.write(http_response("200 OK", OAUTH_PAGE))
+                if not result.done():
+                    result.set_result(params["code"][0])
             else:
-                self.send_response(400)
-                self.end_headers()
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        pass  # Silence logs
-
-def get_authorization_code():
-    """Open browser for authorization and get the code"""
-    
+                # e.g. ?error=access_denied: no point waiting any longer
+                writer.write(http_response("400 Bad Request"))
+                if not result.done():
+                    log.warning(f"Discord authorization failed: {params.get('error', ['no code'])[0]}")
+                    result.set_result(None)
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                IndexError, ConnectionError):
+            pass  # not a request we can answer
+        finally:
+            clients.discard(writer)
+            writer.close()
+
     # Start a temporary local HTTP server
-    server = http.server.HTTPServer(('127.0.0.1', REDIRECT_PORT), OAuthHandler)
-    server.timeout = 120  # 2 minutes timeout
-    
-    # Build authorization URL
-    scopes = "identify rpc rpc.voice.read rpc.voice.write"
-    auth_url = (
-        f"https://discord.com/api/oauth2/authorize"
-        f"?client_id={discord_client_id}"
-        f"&redirect_uri={urllib.parse.quote(get_redirect_uri())}"
-        f"&response_type=code"
-        f"&scope={urllib.parse.quote(scopes)}"
-    )
-    
-    print("Opening browser for Discord authorization...")
-    webbrowser.open(auth_url)
-    
-    print("Waiting for authorization...")
-    
-    # Wait for callback
-    OAuthHandler.auth_code = None
-    while OAuthHandler.auth_code is None:
-        server.handle_request()
-    
-    server.server_close()
-    return OAuthHandler.auth_code
+    server = await asyncio.start_server(handle, "127.0.0.1", REDIRECT_PORT)
+    try:
+        # Build authorization URL
+        scopes = "identify rpc rpc.voice.read rpc.voice.write"
+        auth_url = (
+            f"https://discord.com/api/oauth2/authorize"
+            f"?client_id={discord_client_id}"
+            f"&redirect_uri={urllib.parse.quote(get_redirect_uri())}"
+            f"&response_type=code"
+            f"&scope={urllib.parse.quote(scopes)}"
+        )
+
+        log.info("Opening browser for Discord authorization...")
+        log.info(f"If no browser opens (e.g. headless), visit: {auth_url}")
+        # Some browsers block webbrowser.open() until they exit
+        loop.run_in_executor(None, webbrowser.open, auth_url)
+
+        log.info(f"Waiting for authorization (up to {timeout}s)...")
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError:
+            return None
+    finally:
+        server.close()
+        for writer in clients:
+            writer.close()
+        await server.wait_closed()
 
 def first_time_setup():
     """Initial setup - ask for Client ID and Secret"""
@@ -384,288 +989,2239 @@ def first_time_setup():
     print()
     return True
 
-def get_access_token():
+def load_config():
+    """Load config.json over the defaults (the file is optional)"""
+    global config
+
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            user_config = json.load(f)
+    except FileNotFoundError:
+        return config
+    except Exception as e:
+        log.warning(f"Error reading {CONFIG_FILE}: {e} - using defaults")
+        return config
+
+    for key, value in user_config.items():
+        if key not in DEFAULT_CONFIG:
+            log.warning(f"Unknown setting '{key}' in {CONFIG_FILE}, ignored")
+            continue
+        config[key] = value
+
+    if config["mixer_policy"] not in MIXER_POLICIES:
+        log.warning(f"Unknown mixer_policy '{config['mixer_policy']}', using 'latest'")
+        config["mixer_policy"] = "latest"
+
+    for key in ("discord_probe_interval", "discord_probe_timeout", "discord_command_timeout"):
+        value = config[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            log.warning(f"Invalid {key} {config[key]!r}, using {DEFAULT_CONFIG[key]}")
+            config[key] = DEFAULT_CONFIG[key]
+
+    return config
+
+def get_token_lock():
+    global token_lock
+    if token_lock is None:
+        token_lock = asyncio.Lock()
+    return token_lock
+
+async def refresh_saved_token(token_data):
+    """Run a refresh-token grant and save the result, return it or None"""
+    if not token_data or 'refresh_token' not in token_data:
+        return None
+
+    new_token_data = await refresh_access_token(token_data['refresh_token'])
+    if not new_token_data or 'access_token' not in new_token_data:
+        return None
+
+    save_token(new_token_data)
+    return new_token_data
+
+async def get_access_token():
     """Get a valid access token"""
-    
-    # Try to reuse existing token
-    token_data = load_token()
-    if token_data and 'access_token' in token_data:
-        # Try to refresh
-        if 'refresh_token' in token_data:
-            new_token_data = refresh_access_token(token_data['refresh_token'])
+    async with get_token_lock():
+        token_data = load_token()
+
+        # Still valid: reuse it, no network call
+        if token_data and 'access_token' in token_data:
+            if token_time_left(token_data) > TOKEN_REFRESH_MARGIN:
+                return token_data['access_token']
+
+            # Expiring or expiry unknown: try to refresh
+            new_token_data = await refresh_saved_token(token_data)
             if new_token_data:
-                save_token(new_token_data)
                 return new_token_data['access_token']
-    
-    # Otherwise, new authorization
-    print()
-    code = get_authorization_code()
-    
-    if not code:
-        print("No authorization code received.")
-        return None
-    
-    print("Exchanging code for token...")
-    token_data = exchange_code_for_token(code)
-    
-    if not token_data or 'access_token' not in token_data:
-        print("Unable to get token.")
-        return None
-    
-    save_token(token_data)
-    return token_data['access_token']
 
-async def connect_discord():
-    """Connect to Discord RPC with error handling"""
-    global discord_rpc, status_text
+            # Refresh failed but not rejected (e.g. discord.com unreachable):
+            # the token still works, token_refresh_loop tries again later
+            status = get_token_client().last_status
+            if token_time_left(token_data) > 0 and not (status and 400 <= status < 500):
+                log.warning("Token refresh failed, using the current token until it expires")
+                return token_data['access_token']
+
+        # Otherwise, new authorization
+        code = await get_authorization_code()
+
+        if not code:
+            log.error("No authorization code received.")
+            return None
+
+        log.info("Exchanging code for token...")
+        token_data = await exchange_code_for_token(code)
+
+        if not token_data or 'access_token' not in token_data:
+            log.error("Unable to get token.")
+            return None
+
+        save_token(token_data)
+        return token_data['access_token']
+
+async def token_refresh_loop():
+    """Refresh the saved token shortly before it expires, in the background"""
+    while True:
+        try:
+            token_data = load_token()
+            if not token_data or 'refresh_token' not in token_data:
+                # Nothing to refresh yet (first authorization still pending)
+                await asyncio.sleep(TOKEN_REFRESH_RETRY)
+                continue
+
+            delay = token_time_left(token_data) - TOKEN_REFRESH_MARGIN
+            if delay > 0:
+                # Wake up regularly in case the file was replaced meanwhile
+                await asyncio.sleep(min(delay, TOKEN_REFRESH_MARGIN))
+                continue
+
+            async with get_token_lock():
+                # Someone may have refreshed while we waited for the lock
+                token_data = load_token()
+                if token_time_left(token_data) > TOKEN_REFRESH_MARGIN:
+                    continue
+                refreshed = await refresh_saved_token(token_data)
+        except Exception as e:
+            # e.g. a mangled token file that can't be rewritten: never take the app down
+            log.error(f"Background token refresh error: {str(e) or type(e).__name__}")
+            refreshed = None
 
-    # Close old connection if exists
-    if discord_rpc:
+        if refreshed:
+            log.info("Discord token refreshed in background")
+        else:
+            log.warning(f"Background token refresh failed. Retrying in {TOKEN_REFRESH_RETRY}s...")
+            await asyncio.sleep(TOKEN_REFRESH_RETRY)
+
+# === Reconnection supervisors ===
+
+class Backoff:
+    """Exponential retry delays with jitter, so retries don't fire in lockstep"""
+
+    def __init__(self, cap, base=None):
+        self.cap = cap
+        self.base = RETRY_MIN_DELAY if base is None else base
+        self.attempts = 0
+
+    def next(self):
+        """Delay before the next attempt: half fixed, half random"""
+        delay = min(self.cap, self.base * 2 ** self.attempts)
+        self.attempts += 1
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def reset(self):
+        self.attempts = 0
+
+# Set while the GoXLR websocket is connected and its status is loaded
+goxlr_ready = asyncio.Event()
+
+def note_ready():
+    """Record how long startup took, once both sides are up"""
+    if health_stats["ready_after"] is not None or health_stats["started"] is None:
+        return
+    if discord_ready.is_set() and goxlr_ready.is_set():
+        health_stats["ready_after"] = time.monotonic() - health_stats["started"]
+        log.info(f"Discord and GoXLR ready after {health_stats['ready_after']:.2f}s")
+
+# === Discord IPC client ===
+
+class DiscordIPCError(Exception):
+    """Discord answered a command with an ERROR event, or closed the connection"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def discord_ipc_paths():
+    """Paths of the local Discord IPC endpoints (discord-ipc-0 to -9), in order"""
+    if sys.platform == "win32":
+        folders = [r"\\?\pipe"]
+    else:
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if not runtime_dir:
+            runtime_dir = f"/run/user/{os.getuid()}"
+            if not os.path.isdir(runtime_dir):
+                import tempfile
+                runtime_dir = tempfile.gettempdir()
+        # Native, Snap and Flatpak installs
+        folders = [os.path.join(runtime_dir, sub) for sub in (
+            "", "snap.discord", "app/com.discordapp.Discord", "app/com.discordapp.DiscordCanary")]
+
+    paths = []
+    for folder in folders:
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        paths += [os.path.join(folder, name) for name in names
+                  if name.startswith("discord-ipc-") and name[12:].isdigit()]
+    return sorted(paths, key=lambda path: int(path.rsplit("-", 1)[1]))
+
+class DiscordIPC:
+    """Async client for Discord's local RPC socket.
+
+    Frames are a little-endian (opcode, length) header and a JSON body.
+    Every command carries a nonce and a reader task matches replies to it,
+    so commands can be pipelined, each with its own deadline. Events
+    (DISPATCH frames, see subscribe()) are queued for next_event().
+    """
+
+    OP_HANDSHAKE, OP_FRAME, OP_CLOSE, OP_PING, OP_PONG = range(5)
+
+    def __init__(self, client_id, path, timeout=DISCORD_SETUP_TIMEOUT):
+        self.client_id = client_id
+        self.path = path
+        self.timeout = timeout
+        self.user = None
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending = {}  # nonce → future
+        self._next_nonce = 0
+        self._events = asyncio.Queue()
+        self.closed = None  # the exception that ended the connection
+        self.stats = {"ok": 0, "timeouts": 0, "errors": 0}  # commands by outcome
+
+    @property
+    def pending(self):
+        """Commands sent and not answered yet"""
+        return len(self._pending)
+
+    async def connect(self, timeout=DISCORD_CONNECT_TIMEOUT):
+        """Open the socket and do the handshake"""
+        await asyncio.wait_for(self._open(), timeout)
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _open(self):
+        if sys.platform == "win32":
+            loop = asyncio.get_running_loop()
+            self._reader = asyncio.StreamReader()
+            transport, protocol = await loop.create_pipe_connection(
+                lambda: asyncio.StreamReaderProtocol(self._reader), self.path)
+            self._writer = asyncio.StreamWriter(transport, protocol, self._reader, loop)
+        else:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+
+        self._send(self.OP_HANDSHAKE, {"v": 1, "client_id": str(self.client_id)})
+        op, payload = await self._read_frame()
+        if op == self.OP_CLOSE or payload.get("evt") != "READY":
+            self.close()
+            raise DiscordIPCError(payload.get("code"), payload.get("message") or "handshake refused")
+        self.user = (payload.get("data") or {}).get("user")
+
+    def _send(self, op, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self._writer.write(struct.pack("<II", op, len(body)) + body)
+
+    async def _read_frame(self):
+        op, length = struct.unpack("<II", await self._reader.readexactly(8))
+        return op, json_loads(await self._reader.readexactly(length))
+
+    async def _read_loop(self):
+        """Route replies to their command and events to the queue, until the socket closes"""
+        try:
+            while True:
+                op, payload = await self._read_frame()
+                if op == self.OP_PING:
+                    self._send(self.OP_PONG, payload)
+                    continue
+                if op == self.OP_CLOSE:
+                    raise DiscordIPCError(payload.get("code"), payload.get("message") or "closed by Discord")
+
+                future = self._pending.get(payload.get("nonce"))
+                if future is not None:
+                    if future.done():
+                        continue  # its deadline passed
+                    if payload.get("evt") == "ERROR":
+                        data = payload.get("data") or {}
+                        future.set_exception(DiscordIPCError(data.get("code"), data.get("message")))
+                    else:
+                        future.set_result(payload.get("data"))
+                elif payload.get("cmd") == "DISPATCH":
+                    self._events.put_nowait((payload.get("evt"), payload.get("data")))
+        except asyncio.CancelledError:
+            self.closed = ConnectionError("connection closed")
+            raise
+        except Exception as e:
+            self.closed = e if isinstance(e, DiscordIPCError) else ConnectionError(
+                f"Discord IPC closed: {str(e) or type(e).__name__}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(self.closed)
+            self._events.put_nowait(None)
+
+    async def command(self, cmd, args=None, evt=None, timeout=None):
+        """Send one command, return the data of its reply (DiscordIPCError on ERROR)"""
+        if self.closed:
+            raise self.closed
+        self._next_nonce += 1
+        nonce = str(self._next_nonce)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[nonce] = future
+        payload = {"cmd": cmd, "args": args or {}, "nonce": nonce}
+        if evt:
+            payload["evt"] = evt
         try:
-            discord_rpc.close()
-        except:
+            self._send(self.OP_FRAME, payload)
+            reply = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # Its nonce is forgotten below, so a late reply is dropped
+            self._count("timeouts")
+            raise asyncio.TimeoutError(f"{cmd} got no reply within {timeout or self.timeout}s") from None
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            del self._pending[nonce]
+        self._count("ok")
+        return reply
+
+    def _count(self, outcome):
+        self.stats[outcome] += 1
+        health_stats[f"rpc_{outcome}"] += 1
+
+    async def authenticate(self, access_token, timeout=None):
+        return await self.command("AUTHENTICATE", {"access_token": access_token}, timeout=timeout)
+
+    async def subscribe(self, evt, args=None, timeout=None):
+        """Have Discord send evt events, read them with next_event()"""
+        return await self.command("SUBSCRIBE", args, evt=evt, timeout=timeout)
+
+    async def get_voice_settings(self, timeout=None):
+        return await self.command("GET_VOICE_SETTINGS", timeout=timeout)
+
+    async def set_voice_settings(self, timeout=None, **settings):
+        return await self.command("SET_VOICE_SETTINGS", settings, timeout=timeout)
+
+    async def next_event(self):
+        """Wait for the next (evt, data) event, raise once the connection is closed"""
+        event = await self._events.get()
+        if event is None:
+            self._events.put_nowait(None)  # for any other reader
+            raise self.closed
+        return event
+
+    def close(self):
+        """Say goodbye and close the socket (safe to call more than once)"""
+        if self._writer is None:
+            return
+        try:
+            self._send(self.OP_CLOSE, {"v": 1, "client_id": str(self.client_id)})
+            self._writer.close()
+        except Exception:
             pass
-        discord_rpc = None
+        self._writer = None
+        if self._read_task:
+            self._read_task.cancel()
+
+# === Discord connection health ===
+
+# Set while at least one Discord client is connected
+discord_ready = asyncio.Event()
+# Ask the health monitor to check (or reconnect) right away
+discord_wakeup = asyncio.Event()
+# IPC paths of clients dropped for not answering in time, until they are back
+discord_stalled = set()
+
+health_stats = {
+    "probes": 0,            # liveness checks sent
+    "probe_failures": 0,    # checks that failed or timed out
+    "reconnects": 0,        # successful (re)connections
+    "last_contact": None,   # monotonic time of the last good RPC reply
+    "last_detect": None,    # seconds from last good reply to failure detection
+    "rpc_ok": 0,            # Discord RPC calls answered in time
+    "rpc_timeouts": 0,      # ... that hit their deadline
+    "rpc_errors": 0,        # ... that failed otherwise (ERROR reply, connection lost)
+    "goxlr_reconnects": 0,  # successful GoXLR websocket connections
+    "goxlr_requests": 0,    # requests sent to GoXLR Utility
+    "goxlr_timeouts": 0,    # ... that got no reply in time
+    "started": None,        # monotonic time main_loop started
+    "ready_after": None,    # seconds until Discord and GoXLR were both up
+}
+
+class DiscordLink:
+    """One connected Discord client (Stable, PTB, Canary...) and its own state.
+
+    Each link has its own voice settings cache, event and writer tasks,
+    latency and stats, so a client that hangs or quits only takes itself
+    down while the others carry on.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.name = os.path.basename(client.path)  # discord-ipc-N
+        self.voice = {}          # last known voice settings ("mute", "deaf")
+        self.voice_live = False  # voice is seeded and kept fresh by events
+        self.last_contact = None
+        self.tasks = []          # its event and writer tasks
+        self.latency = LatencyHistogram()  # GoXLR change → this client acknowledged
+        self.stats = {"writes": 0, "failures": 0, "timeouts": 0}
+        self.stalled = False     # a call hit its deadline: Discord froze with the pipe open
+        # Settings this client doesn't have yet, see DesiredState
+        self.dirty = {}          # key -> monotonic time it first diverged
+        self.since = None        # monotonic time of the oldest change not taken yet
+        self.event_time = None   # monotonic time of the latest change
+        self.wakeup = asyncio.Event()
+
+    def contact(self):
+        self.last_contact = health_stats["last_contact"] = time.monotonic()
+
+    def remember_voice(self, data):
+        """Update the voice cache from a voice settings payload"""
+        if isinstance(data, dict):
+            for key in ("mute", "deaf"):
+                if key in data:
+                    self.voice[key] = data[key]
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        self.client.close()
+
+    def report(self):
+        return {
+            "user": (self.client.user or {}).get("username"),
+            "voice_live": self.voice_live,
+            **self.stats,
+            "rpc": dict(self.client.stats),
+            "e2e": self.latency.summary(),
+        }
+
+def drop_discord_link(link, reason):
+    """Close a dead (or frozen) Discord client, the health monitor reconnects it"""
+    if discord_links.get(link.client.path) is not link:
+        return  # already dropped
+    del discord_links[link.client.path]
+    if link.stalled:
+        # The tray shows stalled, not a stale mute state, until it is back
+        discord_stalled.add(link.client.path)
+    link.close()
+    if desired_voice:
+        desired_voice.drop(link)
+    discord_wakeup.set()
+    if not discord_links:
+        discord_ready.clear()
+    update_tray_icon()
+
+    if link.last_contact is not None:
+        detect = time.monotonic() - link.last_contact
+        health_stats["last_detect"] = detect
+        latency["detect"].record(detect)
+        log.warning(f"Discord connection lost [{link.name}] ({reason}), detected within {detect:.1f}s")
+    else:
+        log.warning(f"Discord connection lost [{link.name}] ({reason})")
+
+async def probe_discord(link):
+    """Cheap liveness check: GET_VOICE_SETTINGS with a deadline"""
+    health_stats["probes"] += 1
+    reply = await link.client.get_voice_settings(timeout=config["discord_probe_timeout"])
+    link.contact()
+    link.remember_voice(reply)
+
+async def check_discord_link(link):
+    # A write in progress is a liveness check of its own
+    if link.client.pending:
+        return
+    try:
+        await probe_discord(link)
+    except Exception as e:
+        health_stats["probe_failures"] += 1
+        link.stalled = isinstance(e, asyncio.TimeoutError)
+        drop_discord_link(link, f"check failed: {str(e) or type(e).__name__}")
+        if not discord_links:
+            app_state.update(status="Discord not responding - reconnecting...")
+
+async def discord_health_loop():
+    """Keep a connection to every Discord client: connect, probe, reconnect in background"""
+    backoff = Backoff(DISCORD_RETRY_DELAY)
+    connecting = None
+    try:
+        while app_running:
+            try:
+                # Also picks up clients started later (e.g. Canary next to Stable).
+                # In the background while others are up, so a hung client's
+                # connect attempt doesn't hold up probing the healthy ones
+                if connecting is None:
+                    connecting = asyncio.create_task(connect_discord())
+                if not discord_links:
+                    await asyncio.wait({connecting})
+                if connecting.done():
+                    done, connecting = connecting, None
+                    if done.result():
+                        backoff.reset()
+                if not discord_links:
+                    delay = backoff.next()
+                    log.info(f"Discord not available. Retrying in {delay:.1f}s...")
+                    await wait_for_wakeup(delay)
+                    continue
+
+                await wait_for_wakeup(config["discord_probe_interval"])
+                # Concurrently, so one hung client doesn't hold up the others' checks
+                await asyncio.gather(*(check_discord_link(link) for link in list(discord_links.values())))
+            except Exception as e:
+                # Anything unexpected (OAuth, token file, callback port...) only
+                # delays Discord, the GoXLR side keeps running
+                delay = backoff.next()
+                log.error(f"Discord monitor error: {str(e) or type(e).__name__}. Retrying in {delay:.1f}s...")
+                if not discord_links:
+                    app_state.update(status=f"Discord error: {str(e) or type(e).__name__}")
+                await wait_for_wakeup(delay)
+    finally:
+        if connecting is not None:
+            connecting.cancel()
 
-    access_token = get_access_token()
+async def wait_for_wakeup(timeout):
+    """Sleep for timeout seconds, or until someone sets discord_wakeup"""
+    try:
+        await asyncio.wait_for(discord_wakeup.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    discord_wakeup.clear()
+
+def close_discord():
+    """Close every Discord connection"""
+    for link in discord_links.values():
+        link.close()
+    discord_links.clear()
+    discord_ready.clear()
+
+# Last connection error per IPC path, so a stale socket is only reported once
+discord_connect_errors = {}
+
+def is_auth_error(error):
+    """Discord rejected the token (a client that timed out says nothing about it)"""
+    text = str(error).lower()
+    return isinstance(error, DiscordIPCError) and ("access token" in text or "authenticate" in text)
+
+async def open_discord_link(path, access_token):
+    """Connect and authenticate to one Discord client, subscribe to its events"""
+    client = DiscordIPC(discord_client_id, path, config["discord_command_timeout"])
+    try:
+        await client.connect()
+        # Discord may still be starting up: give it longer than later calls
+        await client.authenticate(access_token, timeout=DISCORD_SETUP_TIMEOUT)
+    except BaseException:
+        client.close()
+        raise
+    link = DiscordLink(client)
+    await start_discord_events(link)
+    return link
+
+def add_discord_link(link):
+    """Start using a connected client: bring it up to date and keep it there"""
+    first = not discord_links
+    discord_links[link.client.path] = link
+    discord_connect_errors.pop(link.client.path, None)
+    discord_stalled.discard(link.client.path)
+    health_stats["reconnects"] += 1
+    link.contact()
+    if desired_voice:
+        # Discord may have changed while we were away
+        desired_voice.add(link)
+        link.tasks.append(asyncio.create_task(discord_writer(desired_voice, link)))
+
+    user = (link.client.user or {}).get("username")
+    log.info(f"Connected to Discord! [{link.name}]" + (f" as {user}" if user else ""))
+    if first:
+        app_state.update(status="Connected to Discord")
+        discord_ready.set()
+        mark_startup("discord_connected")
+        note_ready()
+    update_tray_icon()
+
+async def connect_discord():
+    """Connect to every Discord client not connected yet, return how many were added"""
+    available = discord_ipc_paths()
+    if discord_stalled.difference(available):
+        # A frozen client that has quit since is just gone
+        discord_stalled.intersection_update(available)
+        update_tray_icon()
+    paths = [path for path in available if path not in discord_links]
+    if not paths:
+        return 0
+    if not discord_links:
+        log.info("Connecting to Discord RPC...")
+
+    access_token = await get_access_token()
     if not access_token:
+        return 0
+
+    async def connect_all():
+        return await asyncio.gather(*(open_discord_link(path, access_token) for path in paths),
+                                    return_exceptions=True)
+
+    results = await connect_all()
+    if not any(isinstance(result, DiscordLink) for result in results) \
+            and any(is_auth_error(result) for result in results):
+        # Token rejected: authorize again
+        log.info("Trying with new token...")
+        if os.path.exists(TOKEN_FILE):
+            os.remove(TOKEN_FILE)
+        access_token = await get_access_token()
+        if not access_token:
+            return 0
+        results = await connect_all()
+
+    added = 0
+    for path, result in zip(paths, results):
+        if isinstance(result, DiscordLink):
+            add_discord_link(result)
+            added += 1
+            continue
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        # Convert error to string safely, avoiding unicode issues
+        error_msg = (str(result) or type(result).__name__).encode('ascii', errors='ignore').decode('ascii')
+        if discord_connect_errors.get(path) != error_msg:
+            discord_connect_errors[path] = error_msg
+            log.warning(f"Discord connection error [{os.path.basename(path)}]: {error_msg}")
+        if not discord_links:
+            app_state.update(status=f"Discord error: {error_msg}")
+    return added
+
+# === Discord → GoXLR sync ===
+
+async def start_discord_events(link):
+    """Subscribe to voice settings changes (sync still works without)"""
+    try:
+        await link.client.subscribe("VOICE_SETTINGS_UPDATE", timeout=DISCORD_SETUP_TIMEOUT)
+        # Start from Discord's real state, so we know which writes change it
+        link.remember_voice(await link.client.get_voice_settings(timeout=DISCORD_SETUP_TIMEOUT))
+    except Exception as e:
+        log.warning(f"Discord events unavailable [{link.name}], Discord → GoXLR sync disabled: {e}")
+        return
+    # Events keep it fresh from here on, so writes it already has can be skipped
+    link.voice_live = True
+    link.tasks.append(asyncio.create_task(discord_event_loop(link)))
+
+async def discord_event_loop(link):
+    """Handle events from one Discord client until its connection closes"""
+    while True:
+        try:
+            evt, data = await link.client.next_event()
+        except Exception as e:
+            # Discord quit or crashed: no need to wait for the next check
+            drop_discord_link(link, f"connection closed: {str(e) or type(e).__name__}")
+            return
+
+        if evt == "VOICE_SETTINGS_UPDATE":
+            try:
+                await on_discord_voice_update(link, data or {})
+            except Exception as e:
+                log.error(f"Error handling Discord voice update: {e}")
+
+async def on_discord_voice_update(link, data):
+    """A Discord client's mute changed: push it to the GoXLR cough button"""
+    mute = data.get("mute")
+    if mute is None:
+        return
+    received = time.monotonic()
+
+    echo = echo_guard.consume_discord(link, mute)
+    previous = link.voice.get("mute")
+    link.remember_voice(data)
+
+    # Our own write coming back, or nothing changed: nothing to do
+    if echo or mute == previous:
+        return
+
+    app_state.update(muted=mute)
+    update_tray_icon()
+
+    if not config["discord_to_goxlr"] or goxlr_mixers is None:
+        return
+    if desired_voice:
+        # GoXLR follows this client here (and so do the other clients),
+        # so don't push the old state back later
+        desired_voice.accept(link, {"mute": mute})
+    if goxlr_mixers.discord_muted() == mute:
+        return  # GoXLR already agrees
+
+    log.debug("Discord: %s from Discord [%s] → GoXLR", "Muted" if mute else "Unmuted", link.name)
+    await push_mute_to_goxlr(mute, received)
+
+def goxlr_cough_target(serial, mute):
+    """Cough state to set on a mixer for a Discord mute state"""
+    if not mute:
+        return "Unmuted"
+    # Respect the button's mute function (all, or only some outputs)
+    mute_type = goxlr_mixers.mute_type.get(serial)
+    return "MutedToAll" if mute_type in (None, "All") else "MutedToX"
+
+async def send_goxlr_command(serial, command):
+    """Send a command to GoXLR Utility and wait for it to be accepted"""
+    if goxlr_conn is None:
         return False
+    await goxlr_conn.request({"Command": [serial, command]})
+    return True
 
+async def push_mute_to_goxlr(mute, started):
+    """Set the cough button of every driving mixer that disagrees with Discord"""
+    async def push(serial, target):
+        try:
+            await send_goxlr_command(serial, {"SetCoughMuteState": target})
+        except Exception as e:
+            log.warning(f"  → GoXLR error [{serial}]: {str(e) or type(e).__name__}")
+
+    pushes = []
+    for serial in goxlr_mixers.driving_mixers():
+        if is_cough_muted(goxlr_mixers.cough.get(serial)) == mute:
+            continue
+        target = goxlr_cough_target(serial, mute)
+        echo_guard.expect_goxlr(serial, target, started)
+        pushes.append(push(serial, target))
+    # One request per mixer, all in flight at once
+    await asyncio.gather(*pushes)
+
+def describe_voice_settings(settings):
+    words = {"mute": ("Muted", "Unmuted"), "deaf": ("Deafened", "Undeafened")}
+    return ", ".join(words[key][0 if value else 1] for key, value in settings.items())
+
+async def sync_voice_settings(link, settings):
+    """Sync voice settings ({"mute": bool, "deaf": bool}, either optional) with one Discord client"""
     try:
-        discord_rpc = DiscordClient(discord_client_id)
-        await discord_rpc.start()
-        await discord_rpc.authenticate(access_token)
-        print("Connected to Discord!")
-        status_text = "Connected to Discord"
+        start_time = time.monotonic()
+        if "mute" in settings:
+            app_state.update(muted=settings["mute"])
+
+            # Update icon BEFORE Discord call for immediate feedback (the
+            # tray worker renders it, this only hands over the state)
+            update_tray_icon()
+        rpc_start = record_span("tray", start_time)
+
+        link.stats["writes"] += 1
+        reply = await link.client.set_voice_settings(**settings)
+        link.contact()
+        link.remember_voice(settings)
+        link.remember_voice(reply)
+
+        elapsed = record_span("discord", rpc_start) - start_time
+        status = describe_voice_settings(settings)
+        log.debug("  → Discord [%s]: %s (took %.2fs)", link.name, status, elapsed)
+        app_state.update(status=f"Synced - {status}")
+
         return True
+
+    except asyncio.TimeoutError as e:
+        # Cancelled at the deadline, the writer reconnects in the background
+        link.stats["timeouts"] += 1
+        link.stalled = True
+        log.warning(f"  → Discord not responding [{link.name}]: {e}")
+        app_state.update(status="Discord not responding - reconnecting...")
+        return False
+
     except Exception as e:
-        print(f"Discord connection error: {e}")
-        # Convert error to string safely, avoiding unicode issues
-        error_msg = str(e).encode('ascii', errors='ignore').decode('ascii')
-        status_text = f"Discord error: {error_msg}"
+        link.stats["failures"] += 1
+        log.warning(f"  → Discord error [{link.name}]: {str(e) or type(e).__name__}")
+        app_state.update(status=f"Sync error: {e}")
+        return False
 
-        # If auth error, try with new token
-        if "access token" in str(e).lower() or "authenticate" in str(e).lower():
-            print("Trying with new token...")
-            if os.path.exists(TOKEN_FILE):
-                os.remove(TOKEN_FILE)
+class EchoGuard:
+    """Changes we made ourselves, so their echoes aren't taken as user changes.
 
-            access_token = get_access_token()
-            if not access_token:
-                return False
+    Each write to Discord or command to GoXLR is remembered (keyed on the
+    value we set) until the other side reports it back, or ECHO_WINDOW
+    passes, in case the echo never comes.
+    """
 
-            try:
-                discord_rpc = DiscordClient(discord_client_id)
-                await discord_rpc.start()
-                await discord_rpc.authenticate(access_token)
-                print("Connected to Discord!")
-                status_text = "Connected to Discord"
-                return True
-            except Exception as e2:
-                print(f"Error: {e2}")
-                error_msg2 = str(e2).encode('ascii', errors='ignore').decode('ascii')
-                status_text = f"Discord error: {error_msg2}"
-                return False
+    ECHO_WINDOW = 2.0  # seconds
 
-        return False
+    def __init__(self):
+        self.discord = []  # (DiscordLink, mute, expires)
+        self.goxlr = {}    # serial -> (state, started, expires)
 
-async def sync_mute_state(goxlr_muted):
-    """Sync state with Discord"""
-    global is_muted, discord_rpc, status_text
-    import time
+    def expect_discord(self, link, mute):
+        now = time.monotonic()
+        self.discord = [entry for entry in self.discord if entry[2] > now]
+        self.discord.append((link, mute, now + self.ECHO_WINDOW))
 
-    try:
-        start_time = time.time()
-        is_muted = goxlr_muted
+    def consume_discord(self, link, mute):
+        """True if a Discord client's update is the echo of one of our writes to it"""
+        now = time.monotonic()
+        for entry in self.discord:
+            if entry[0] is link and entry[1] == mute and entry[2] > now:
+                self.discord.remove(entry)
+                return True
+        return False
 
-        # Update icon BEFORE Discord call for immediate feedback
+    def expect_goxlr(self, serial, state, started):
+        self.goxlr[serial] = (state, started, time.monotonic() + self.ECHO_WINDOW)
+
+    def consume_goxlr(self, serial, state):
+        """Start time of our command if a cough patch is its echo, else None"""
+        entry = self.goxlr.get(serial)
+        if entry is None:
+            return None
+        expected, started, expires = entry
+        if time.monotonic() > expires:
+            del self.goxlr[serial]
+            return None
+        if expected != state:
+            return None
+        del self.goxlr[serial]
+        return started
+
+echo_guard = EchoGuard()
+
+class DesiredState:
+    """Voice settings every Discord client should have, reconciled until it does.
+
+    The GoXLR reader put()s settings and never blocks. For each connected
+    client (DiscordLink) a key stays dirty until a write of its latest value
+    to that client succeeds, so presses made while Discord is down are
+    applied once it is back, and a burst of presses collapses into one write
+    per client (latest wins per key).
+    """
+
+    def __init__(self):
+        self.desired = {}  # key -> value Discord should have
+        self.links = []    # connected clients, each with its own dirty keys
+        self._unsent = {}  # key -> monotonic time, changes made while no client was connected
+
+    @property
+    def pending(self):
+        return bool(self._unsent) or any(link.dirty for link in self.links)
+
+    def _mark(self, link, keys, now, event_time):
+        """Make keys dirty on a client and wake its writer"""
+        for key in keys:
+            link.dirty.setdefault(key, now)
+        if not link.wakeup.is_set():
+            link.since = now
+        link.event_time = event_time
+        link.wakeup.set()
+
+    def put(self, value, event_time=None):
+        now = time.monotonic()
+        sync_stats["events"] += 1
+        if any(link.wakeup.is_set() for link in self.links) or not self.links and self._unsent:
+            sync_stats["coalesced"] += 1
+        for key, setting in value.items():
+            self.desired[key] = setting
+            if not self.links:
+                self._unsent.setdefault(key, now)
+        for link in self.links:
+            self._mark(link, value, now, event_time if event_time is not None else now)
+        # The other outputs follow the same state, each at its own pace
+        publish_to_sinks(self.desired, event_time)
+
+    def accept(self, source, value):
+        """A Discord client changed on its own and GoXLR follows: so do the other clients"""
+        now = time.monotonic()
+        for key, setting in value.items():
+            self.desired[key] = setting
+        for link in self.links:
+            if link is source:
+                for key in value:
+                    link.dirty.pop(key, None)
+            else:
+                self._mark(link, value, now, now)
+        publish_to_sinks(self.desired, now)
+
+    def add(self, link):
+        """A client connected: check every desired key on it"""
+        self.links.append(link)
+        if not self.desired:
+            return
+        now = time.monotonic()
+        # Changes made while nobody was connected count from when they were made
+        for key, since in self._unsent.items():
+            link.dirty[key] = since
+        self._unsent = {}
+        self._mark(link, self.desired, now, now)
+
+    def drop(self, link):
+        if link in self.links:
+            self.links.remove(link)
+
+    async def get(self, link):
+        """Wait for settings a client doesn't have yet, return (settings, lag, event time)"""
+        while True:
+            await link.wakeup.wait()
+            link.wakeup.clear()
+            if link.dirty:
+                break
+        lag = record_span("queue", link.since) - link.since
+        sync_stats["last_lag"] = lag
+        sync_stats["max_lag"] = max(sync_stats["max_lag"], lag)
+        settings = {key: self.desired[key] for key in link.dirty}
+        return settings, lag, link.event_time
+
+    def applied(self, link, settings):
+        """A write succeeded: clear what it settled, record convergence when done"""
+        oldest = min(link.dirty.values(), default=None)
+        for key, setting in settings.items():
+            if key in link.dirty and self.desired.get(key) == setting:
+                del link.dirty[key]
+        if not link.dirty and oldest is not None:
+            record_span("converge", oldest)
+            mark_startup("first_sync")
+
+def skip_known_settings(link, settings):
+    """Drop settings a Discord client already has, going by its live voice cache"""
+    if not link.voice_live:
+        return settings
+    if "mute" in settings:
+        app_state.update(muted=settings["mute"])
         update_tray_icon()
+    return {key: value for key, value in settings.items() if link.voice.get(key) != value}
+
+async def discord_writer(desired, link):
+    """Apply the desired voice settings to one Discord client, until a write fails"""
+    while True:
+        wanted, lag, event_time = await desired.get(link)
+        settings = skip_known_settings(link, wanted)
+        if not settings:
+            # Discord already agrees: keep the RPC channel quiet
+            sync_stats["writes_saved"] += 1
+            desired.applied(link, wanted)
+            continue
+
+        sync_stats["writes"] += 1
+        if "mute" in settings and settings["mute"] != link.voice.get("mute"):
+            # Discord will report this change back, it must not bounce to GoXLR
+            echo_guard.expect_discord(link, settings["mute"])
+        success = await sync_voice_settings(link, settings)
+
+        total_time = time.monotonic() - event_time
+        if success:
+            latency["e2e"].record(total_time)
+            link.latency.record(total_time)
+            desired.applied(link, wanted)
+        log.debug("  Total time from event [%s]: %.2fs (queued %.2fs, coalesced so far: %d)",
+                  link.name, total_time, lag, sync_stats["coalesced"])
+
+        if not success:
+            # The health monitor reconnects it in the background; the other
+            # clients have their own writers and carry on meanwhile
+            drop_discord_link(link, "write timed out" if link.stalled else "write failed")
+            return
+
+# === Output sinks (OBS, webhooks, MQTT) ===
+
+class SinkError(Exception):
+    """An output sink refused or failed a send"""
+
+class OutputSink:
+    """Somewhere besides Discord the voice state goes (OBS, stream lights...).
+
+    Subclasses set kind and define async send(settings), which delivers the
+    voice settings (e.g. {"mute": True}) or raises; they may override
+    close() to drop their connection. Each sink gets its own worker task
+    (sink_worker) with a deadline per send and retries, so a slow lamp
+    controller never delays Discord or the other sinks.
+    """
+
+    kind = None
+
+    def __init__(self, options):
+        self.name = str(options.get("name") or self.kind)
+        self.timeout = float(options.get("timeout", SINK_TIMEOUT))
+        self.retries = int(options.get("retries", SINK_RETRIES))
+        self.latency = LatencyHistogram()  # change → sink acknowledged
+        self.stats = {"sent": 0, "failures": 0, "timeouts": 0, "retries": 0, "coalesced": 0}
+        self.healthy = None      # unknown until the first send
+        self.last_error = None
+        self.delivered = None    # settings the sink has
+        self.wanted = None       # settings it should have
+        self.event_time = None   # monotonic time of the change behind wanted
+        self.wakeup = asyncio.Event()
+
+    async def close(self):
+        pass
+
+    def report(self):
+        return {
+            "type": self.kind,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            **self.stats,
+            "latency": self.latency.summary(),
+        }
+
+class WebhookSink(OutputSink):
+    """POST the voice settings as JSON to a URL, e.g. {"mute": true}.
+
+    Speaks just enough HTTP/1.1 on the event loop, over one keep-alive
+    connection: requests in a worker thread costs more CPU per press than
+    the Discord write it runs next to.
+    """
+
+    kind = "webhook"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.url = urllib.parse.urlsplit(options["url"])
+        if self.url.scheme not in ("http", "https") or not self.url.hostname:
+            raise ValueError(f"not an http(s) URL: {options['url']}")
+        self.headers = dict(options.get("headers") or {})
+        self._reader = self._writer = None
+
+    async def _connect(self):
+        https = self.url.scheme == "https"
+        self._reader, self._writer = await asyncio.open_connection(
+            self.url.hostname, self.url.port or (443 if https else 80), ssl=https or None)
+
+    async def _read_reply(self):
+        """Status code of the reply, reading its body so the connection can be reused"""
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while size := int((await self._reader.readline()).split(b";")[0], 16):
+                await self._reader.readexactly(size + 2)
+            await self._reader.readline()
+        elif "content-length" in headers:
+            await self._reader.readexactly(int(headers["content-length"]))
+        elif status not in (204, 304):
+            await self._reader.read()  # body until the server closes
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status
+
+    async def send(self, settings):
+        body = json.dumps(settings).encode("utf-8")
+        head = [f"POST {self.url.path or '/'}{'?' + self.url.query if self.url.query else ''} HTTP/1.1",
+                f"Host: {self.url.netloc}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in self.headers.items()]
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        try:
+            if self._writer is None or self._reader.at_eof():
+                await self.close()
+                await self._connect()
+            self._writer.write(request)
+            status = await self._read_reply()
+        except BaseException:
+            # Timed out or lost: reconnect on the next send
+            await self.close()
+            raise
+        if status >= 300:
+            raise SinkError(f"HTTP {status}")
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+
+class OBSSink(OutputSink):
+    """Mute an OBS input through obs-websocket (protocol v5)"""
+
+    kind = "obs"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.url = options.get("url", "ws://127.0.0.1:4455")
+        self.password = options.get("password")
+        self.input = options["input"]  # OBS input (source) name, e.g. "Mic/Aux"
+        self._ws = None
+        self._request_id = 0
+
+    async def _connect(self):
+        ws = await websockets.connect(self.url)
+        try:
+            hello = json.loads(await ws.recv())
+            identify = {"rpcVersion": 1, "eventSubscriptions": 0}
+            challenge = hello.get("d", {}).get("authentication")
+            if challenge:
+                if not self.password:
+                    raise SinkError("OBS asks for a password")
+                secret = base64.b64encode(hashlib.sha256(
+                    (self.password + challenge["salt"]).encode()).digest())
+                identify["authentication"] = base64.b64encode(hashlib.sha256(
+                    secret + challenge["challenge"].encode()).digest()).decode()
+            await ws.send(json.dumps({"op": 1, "d": identify}))
+            identified = json.loads(await ws.recv())
+            if identified.get("op") != 2:
+                raise SinkError(f"OBS refused identification: {identified}")
+        except BaseException:
+            await ws.close()
+            raise
+        return ws
+
+    async def send(self, settings):
+        if "mute" not in settings:
+            return
+        if self._ws is None:
+            self._ws = await self._connect()
+        self._request_id += 1
+        request_id = str(self._request_id)
+        try:
+            await self._ws.send(json.dumps({"op": 6, "d": {
+                "requestType": "SetInputMute",
+                "requestId": request_id,
+                "requestData": {"inputName": self.input, "inputMuted": settings["mute"]},
+            }}))
+            while True:
+                reply = json.loads(await self._ws.recv())
+                if reply.get("op") == 7 and reply["d"].get("requestId") == request_id:
+                    break
+        except BaseException:
+            # Timed out or lost: the reply may still come, start over next time
+            await self.close()
+            raise
+        status = reply["d"].get("requestStatus", {})
+        if not status.get("result"):
+            raise SinkError(f"OBS error {status.get('code')}: {status.get('comment')}")
+
+    async def close(self):
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            ws.transport.close()
+
+class MQTTSink(OutputSink):
+    """Publish the mute state to an MQTT broker (3.1.1), e.g. for stream lights"""
+
+    kind = "mqtt"
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.host = options.get("host", "127.0.0.1")
+        self.port = int(options.get("port", 1883))
+        self.topic = options.get("topic", "goxlr/discord/mute")
+        self.username = options.get("username")
+        self.password = options.get("password")
+        self.qos = 1 if options.get("qos", 1) else 0  # 1: the broker acknowledges
+        self.retain = bool(options.get("retain", True))  # lights get it on (re)subscribe
+        self.payloads = (str(options.get("payload_unmuted", "unmuted")),
+                         str(options.get("payload_muted", "muted")))
+        self._reader = self._writer = None
+        self._packet_id = 0
+
+    @staticmethod
+    def _packet(kind, body):
+        """Fixed header (type, remaining length) + body"""
+        length, size = b"", len(body)
+        while True:
+            byte, size = size % 128, size // 128
+            length += bytes([byte | (0x80 if size else 0)])
+            if not size:
+                return bytes([kind]) + length + body
+
+    @staticmethod
+    def _string(text):
+        data = text.encode("utf-8")
+        return struct.pack(">H", len(data)) + data
+
+    async def _read_packet(self):
+        kind = (await self._reader.readexactly(1))[0]
+        length, shift = 0, 0
+        while True:
+            byte = (await self._reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return kind, await self._reader.readexactly(length)
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        flags = 0x02  # clean session
+        payload = self._string(f"goxlr-discord-sync-{os.getpid()}")
+        if self.username:
+            flags |= 0x80
+            payload += self._string(self.username)
+            if self.password:
+                flags |= 0x40
+                payload += self._string(self.password)
+        # Keep alive 0: no pings, a dead broker shows up as a failed send
+        self._writer.write(self._packet(0x10, self._string("MQTT") + bytes([4, flags]) +
+                                        struct.pack(">H", 0) + payload))
+        kind, body = await self._read_packet()
+        if kind != 0x20 or len(body) < 2 or body[1] != 0:
+            raise SinkError(f"MQTT broker refused connection (code {body[1] if len(body) > 1 else '?'})")
+
+    async def send(self, settings):
+        if "mute" not in settings:
+            return
+        try:
+            if self._writer is None or self._reader.at_eof():
+                await self.close()
+                await self._connect()
+            body = self._string(self.topic)
+            if self.qos:
+                self._packet_id = self._packet_id % 0xFFFF + 1
+                body += struct.pack(">H", self._packet_id)
+            body += self.payloads[bool(settings["mute"])].encode("utf-8")
+            self._writer.write(self._packet(0x30 | self.qos << 1 | self.retain, body))
+            await self._writer.drain()
+            while self.qos:
+                kind, ack = await self._read_packet()
+                if kind == 0x40 and ack == struct.pack(">H", self._packet_id):
+                    break
+        except BaseException:
+            # Timed out or lost: reconnect on the next send
+            await self.close()
+            raise
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            try:
+                writer.write(b"\xe0\x00")  # DISCONNECT
+                writer.close()
+            except Exception:
+                pass
 
-        await discord_rpc.set_voice_settings(mute=is_muted)
+SINK_TYPES = {sink.kind: sink for sink in (OBSSink, WebhookSink, MQTTSink)}
 
-        elapsed = time.time() - start_time
-        status = "Muted" if is_muted else "Unmuted"
-        print(f"  → Discord: {status} (took {elapsed:.2f}s)")
-        status_text = f"Synced - {status}"
+# Sinks from config.json, built by build_sinks()
+output_sinks = []
 
-        return True
+def build_sinks():
+    """Create the config.json sinks, skipping (and reporting) invalid ones"""
+    global output_sinks
 
+    output_sinks = []
+    for options in config["sinks"]:
+        try:
+            sink = SINK_TYPES[options["type"]](options)
+        except KeyError as e:
+            log.warning(f"Ignoring sink {options!r}: missing or unknown {e}")
+            continue
+        except (ValueError, TypeError, AttributeError) as e:
+            log.warning(f"Ignoring sink {options!r}: {e}")
+            continue
+        # Names key the status report, keep them apart
+        names = {other.name for other in output_sinks}
+        if sink.name in names:
+            sink.name = next(f"{sink.name}{n}" for n in range(2, len(names) + 3)
+                             if f"{sink.name}{n}" not in names)
+        output_sinks.append(sink)
+    if output_sinks:
+        log.info(f"Loaded {len(output_sinks)} output sink(s): "
+                 f"{', '.join(sink.name for sink in output_sinks)}")
+    return output_sinks
+
+def publish_to_sinks(settings, event_time=None):
+    """Hand the desired voice settings to every sink's worker (never blocks)"""
+    now = time.monotonic()
+    for sink in output_sinks:
+        if sink.wakeup.is_set():
+            sink.stats["coalesced"] += 1  # the worker hasn't picked up the last one yet
+        sink.wanted = dict(settings)
+        sink.event_time = event_time if event_time is not None else now
+        sink.wakeup.set()
+
+async def send_to_sink(sink, settings, event_time):
+    """One send with the sink's deadline, True if it got through"""
+    try:
+        await asyncio.wait_for(sink.send(settings), sink.timeout)
+    except asyncio.TimeoutError:
+        sink.stats["timeouts"] += 1
+        sink.last_error = f"no answer within {sink.timeout}s"
+        return False
     except Exception as e:
-        print(f"  → Discord error: {e}")
-        status_text = f"Sync error: {e}"
+        sink.stats["failures"] += 1
+        sink.last_error = str(e) or type(e).__name__
         return False
 
-async def wait_for_goxlr():
-    """Wait for GoXLR Utility to be available"""
-    print("Waiting for GoXLR Utility...")
-    
+    sink.stats["sent"] += 1
+    sink.latency.record(time.monotonic() - event_time)
+    sink.delivered = settings
+    if sink.healthy is False:
+        log.info(f"Output sink '{sink.name}' is back")
+    sink.healthy = True
+    sink.last_error = None
+    return True
+
+async def sink_worker(sink):
+    """Keep one sink up to date with the latest settings, retrying with backoff"""
+    backoff = Backoff(SINK_RETRY_DELAY)
     while True:
+        await sink.wakeup.wait()
+        sink.wakeup.clear()
+        settings = sink.wanted
+        if settings == sink.delivered:
+            continue
+
+        attempts = 0
+        while not await send_to_sink(sink, settings, sink.event_time):
+            attempts += 1
+            if attempts == sink.retries + 1 and sink.healthy is not False:
+                # Out of quick retries: report it, then keep trying in the background
+                sink.healthy = False
+                log.warning(f"Output sink '{sink.name}' not responding: {sink.last_error}")
+            # A newer state ends the wait early and is sent instead
+            try:
+                await asyncio.wait_for(sink.wakeup.wait(), backoff.next())
+            except asyncio.TimeoutError:
+                pass
+            if sink.wakeup.is_set():
+                sink.wakeup.clear()
+                settings = sink.wanted
+                if settings == sink.delivered:
+                    break
+            sink.stats["retries"] += 1
+        backoff.reset()
+
+async def close_sinks():
+    for sink in output_sinks:
         try:
-            async with websockets.connect(GOXLR_WEBSOCKET_URL) as ws:
-                # Connection test successful
-                return True
+            await sink.close()
         except Exception:
             pass
-        
-        await asyncio.sleep(GOXLR_RETRY_DELAY)
 
-async def wait_for_discord():
-    """Wait for Discord to be available and connect"""
-    print("Waiting for Discord...")
-    
-    while True:
-        if await connect_discord():
+# === Multi-mixer state ===
+
+def parse_patch_path(path):
+    """Split '/mixers/<serial>/<field...>' into (serial, field)
+
+    A patch on a whole mixer ('/mixers/<serial>') gives an empty field.
+    """
+    parts = path.split("/", 3)
+    if len(parts) >= 3 and parts[0] == "" and parts[1] == "mixers" and parts[2]:
+        return parts[2], parts[3] if len(parts) == 4 else ""
+    return None, path
+
+def is_cough_muted(state):
+    return state is not None and state != "Unmuted"
+
+class MixerTracker:
+    """Cough state of every GoXLR on the daemon, tracked per serial"""
+
+    def __init__(self, policy="latest", drivers=()):
+        self.policy = policy
+        self.drivers = set(drivers)  # serials that drive Discord, empty = all
+        self.cough = {}              # serial -> cough_button state
+        self.mute_type = {}          # serial -> cough_button mute function
+        self.last_changed = None     # serial of the last driving mixer to change
+
+    def drives_discord(self, serial):
+        return not self.drivers or serial in self.drivers
+
+    def load_status(self, mixers):
+        """Reset from the 'mixers' part of a GetStatus reply"""
+        self.cough = {
+            serial: mixer["cough_button"].get("state")
+            for serial, mixer in mixers.items()
+            if "cough_button" in mixer
+        }
+        self.mute_type = {
+            serial: mixer["cough_button"].get("mute_type")
+            for serial, mixer in mixers.items()
+            if "cough_button" in mixer
+        }
+        self.last_changed = None
+
+    def add_mixer(self, serial, mixer):
+        """A GoXLR was plugged in while connected"""
+        self.cough[serial] = mixer.get("cough_button", {}).get("state")
+        self.mute_type[serial] = mixer.get("cough_button", {}).get("mute_type")
+
+    def remove_mixer(self, serial):
+        """A GoXLR was unplugged"""
+        self.cough.pop(serial, None)
+        self.mute_type.pop(serial, None)
+        if self.last_changed == serial:
+            self.last_changed = None
+
+    def update(self, serial, state):
+        """Record a cough change, return the previous state"""
+        previous = self.cough.get(serial)
+        self.cough[serial] = state
+        if self.drives_discord(serial):
+            self.last_changed = serial
+        return previous
+
+    def driving_mixers(self):
+        return [serial for serial in self.cough if self.drives_discord(serial)]
+
+    def discord_muted(self):
+        """Discord mute wanted by the driving mixers (None if none is connected)"""
+        drivers = self.driving_mixers()
+        if not drivers:
+            return None
+
+        if self.policy == "any":
+            return any(is_cough_muted(self.cough[s]) for s in drivers)
+        if self.policy == "all":
+            return all(is_cough_muted(self.cough[s]) for s in drivers)
+
+        # latest: the last one pressed, or the first one found after GetStatus
+        serial = self.last_changed if self.last_changed in self.cough else drivers[0]
+        return is_cough_muted(self.cough[serial])
+
+# === GoXLR state mirror ===
+
+def escape_pointer(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+def split_pointer(path):
+    """JSON Pointer (RFC 6901) → list of unescaped tokens"""
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {path!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in path[1:].split("/")]
+
+class PatchError(Exception):
+    """A Patch op doesn't fit the mirrored state"""
+
+class GoXLRStateMirror:
+    """In-memory copy of the GoXLR Utility status tree.
+
+    Seeded from GetStatus and kept current by applying each Patch op
+    (RFC 6902) in place. Every node is also indexed by its JSON Pointer, so
+    get("/mixers/<serial>/cough_button/state") is a single dict lookup.
+    Returned containers are the live ones: read them, don't modify them.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.index = {}
+        self.stale = True  # until seeded, or after a patch failed to apply
+        self.stats = {"patches": 0, "failed": 0, "checks": 0, "drifted": 0}
+
+    @property
+    def ready(self):
+        return self.root is not None and not self.stale
+
+    def get(self, path, default=None):
+        return self.index.get(path, default)
+
+    def seed(self, status):
+        """Replace the whole mirror with a fresh GetStatus tree"""
+        self.root = status
+        self.index = {}
+        self._index(("", status))
+        self.stale = False
+
+    def check(self, status):
+        """Compare the mirror to a fresh GetStatus tree, return differing paths"""
+        self.stats["checks"] += 1
+        fresh = GoXLRStateMirror()
+        fresh.seed(status)
+
+        differences = [
+            path for path in self.index.keys() | fresh.index.keys()
+            if path not in self.index or path not in fresh.index
+            or not isinstance(fresh.index[path], (dict, list))
+            and self.index[path] != fresh.index[path]
+        ]
+        if differences:
+            self.stats["drifted"] += 1
+        return sorted(differences)
+
+    def apply(self, ops):
+        """Apply a list of Patch ops, return False (and mark stale) on failure"""
+        if self.root is None:
+            return False
+        try:
+            for op in ops:
+                self._apply_op(op)
+                self.stats["patches"] += 1
             return True
-        
-        print(f"Discord not available. Retrying in {DISCORD_RETRY_DELAY}s...")
-        await asyncio.sleep(DISCORD_RETRY_DELAY)
+        except (PatchError, KeyError, IndexError, TypeError, ValueError) as e:
+            self.stats["failed"] += 1
+            self.stale = True
+            log.warning(f"State mirror out of sync ({e}), will reload")
+            return False
 
-async def main_loop():
-    """Main loop with auto-reconnect"""
-    global discord_rpc, app_running, status_text
+    # --- internals ---
+
+    def _index(self, *items):
+        """Index (pointer, value) pairs and everything below them"""
+        stack = list(items)
+        while stack:
+            pointer, value = stack.pop()
+            self.index[pointer] = value
+            if isinstance(value, dict):
+                stack.extend((f"{pointer}/{escape_pointer(k)}", v) for k, v in value.items())
+            elif isinstance(value, list):
+                stack.extend((f"{pointer}/{i}", v) for i, v in enumerate(value))
+
+    def _unindex(self, pointer, value):
+        """Drop a node and everything below it from the index"""
+        stack = [(pointer, value)]
+        while stack:
+            pointer, value = stack.pop()
+            self.index.pop(pointer, None)
+            if isinstance(value, dict):
+                stack.extend((f"{pointer}/{escape_pointer(k)}", v) for k, v in value.items())
+            elif isinstance(value, list):
+                stack.extend((f"{pointer}/{i}", v) for i, v in enumerate(value))
+
+    def _parent(self, path):
+        """Return (parent container, its pointer, last token) for a path"""
+        if not path.startswith("/"):
+            raise ValueError(f"Invalid JSON pointer: {path!r}")
+        split = path.rfind("/")
+        parent_pointer = path[:split]
+        if parent_pointer not in self.index:
+            raise PatchError(f"no parent for {path}")
+        token = path[split + 1:].replace("~1", "/").replace("~0", "~")
+        return self.index[parent_pointer], parent_pointer, token
+
+    def _list_index(self, container, token, allow_end=False):
+        if token == "-" and allow_end:
+            return len(container)
+        index = int(token)
+        limit = len(container) + (1 if allow_end else 0)
+        if not 0 <= index < limit:
+            raise PatchError(f"list index {token} out of range")
+        return index
+
+    def _reindex_list(self, pointer, container, start):
+        """Re-index list items from start, after an insert or delete shifted them"""
+        self._index(*((f"{pointer}/{i}", container[i]) for i in range(start, len(container))))
+
+    def _add(self, path, value):
+        if path == "":
+            self.seed(value)
+            return
+        container, pointer, token = self._parent(path)
+        if isinstance(container, dict):
+            if token in container:
+                self._unindex(path, container[token])
+            container[token] = value
+            self._index((path, value))
+        elif isinstance(container, list):
+            index = self._list_index(container, token, allow_end=True)
+            for i in range(index, len(container)):
+                self._unindex(f"{pointer}/{i}", container[i])
+            container.insert(index, value)
+            self._reindex_list(pointer, container, index)
+        else:
+            raise PatchError(f"{pointer} is not a container")
+
+    def _remove(self, path):
+        container, pointer, token = self._parent(path)
+        if isinstance(container, dict):
+            value = container.pop(token)
+            self._unindex(path, value)
+        elif isinstance(container, list):
+            index = self._list_index(container, token)
+            for i in range(index, len(container)):
+                self._unindex(f"{pointer}/{i}", container[i])
+            value = container.pop(index)
+            self._reindex_list(pointer, container, index)
+        else:
+            raise PatchError(f"{pointer} is not a container")
+        return value
+
+    def _replace(self, path, value):
+        if path == "":
+            self.seed(value)
+            return
+        container, pointer, token = self._parent(path)
+        if isinstance(container, list):
+            token = self._list_index(container, token)
+        elif token not in container:
+            raise PatchError(f"replace of missing {path}")
+        old = container[token]
+        container[token] = value
+        if isinstance(old, (dict, list)) or isinstance(value, (dict, list)):
+            self._unindex(path, old)
+            self._index((path, value))
+        else:
+            # A scalar for a scalar (faders, volumes): nothing below to re-index
+            self.index[path] = value
+
+    def _apply_op(self, op):
+        kind = op.get("op")
+        path = op.get("path", "")
+
+        if kind == "replace":
+            self._replace(path, op["value"])
+        elif kind == "add":
+            self._add(path, op["value"])
+        elif kind == "remove":
+            self._remove(path)
+        elif kind == "move":
+            self._add(path, self._remove(op["from"]))
+        elif kind == "copy":
+            if op["from"] not in self.index:
+                raise PatchError(f"copy from missing {op['from']}")
+            self._add(path, copy.deepcopy(self.index[op["from"]]))
+        elif kind == "test":
+            if self.index.get(path) != op.get("value"):
+                raise PatchError(f"test failed at {path}")
+        else:
+            raise PatchError(f"unknown op {kind!r}")
+
+# Mirror of the GoXLR Utility state, for anything that needs to look up a field
+goxlr_state = GoXLRStateMirror()
+
+def reload_state_mirror(status):
+    """Check the mirror against a fresh GetStatus tree, then reseed from it.
+
+    Returns the paths that differed (empty on first load).
+    """
+    differences = []
+    if goxlr_state.ready:
+        differences = goxlr_state.check(status)
+        if differences:
+            log.info(f"State mirror differed from GoXLR Utility at {len(differences)} path(s), "
+                     f"e.g. {', '.join(differences[:3])}")
+        else:
+            log.info("State mirror checked: in sync with GoXLR Utility")
+    goxlr_state.seed(status)
+    return differences
+
+# Substrings a Patch frame must contain to be worth decoding. Nearly all
+# GoXLR traffic is faders, meters and volumes, which can be dropped from
+# the raw text without building any Python objects.
+BASE_PATCH_FILTER = ("cough_button", '"remove"')
+PATCH_FILTER = BASE_PATCH_FILTER  # plus rule path keys, see build_rule_engine()
+
+def frame_is_relevant(message):
+    """Cheap substring check on a raw websocket frame, before JSON decoding"""
+    for key in PATCH_FILTER:
+        if key in message:
+            return True
+    return False
+
+# === Rule engine (GoXLR state → Discord) ===
+
+_NO_VALUE = object()
+
+class RuleEngine:
+    """Maps GoXLR state paths to Discord voice settings, from config.json "rules".
+
+    A rule looks like:
+        {"path": "/mixers/*/fader_status/A/mute_state", "action": "deaf",
+         "values": {"Unmuted": false, "*": true}}
+
+    "*" in a path matches any one token (e.g. any mixer serial). The value
+    is mapped through "values" ("*" = any other value), or "set" gives a
+    fixed result that fires whenever the path changes; without either,
+    anything but Unmuted/false/0/empty means on.
+
+    Rule paths are compiled into a trie of path tokens, so matching a patch
+    costs time proportional to its depth, not to the number of rules.
+    """
+
+    ACTIONS = ("mute", "deaf")
+
+    def __init__(self, rules=()):
+        self.root = self._node()
+        self.rules = []
+        self.keys = set()  # literal path tokens, for the frame pre-filter
+        self.last = {}     # concrete path -> last value seen, rules fire on change
+        for rule in rules:
+            self.add(rule)
+
+    @staticmethod
+    def _node():
+        return {"children": {}, "rules": []}
+
+    def add(self, rule):
+        path = rule.get("path", "")
+        if not isinstance(path, str) or not path.startswith("/"):
+            raise ValueError(f"rule path must start with '/': {path!r}")
+        if rule.get("action") not in self.ACTIONS:
+            raise ValueError(f"rule action must be one of {', '.join(self.ACTIONS)}")
+
+        tokens = path[1:].split("/")
+        node = self.root
+        for token in tokens:
+            node = node["children"].setdefault(token, self._node())
+        node["rules"].append(rule)
+
+        literal = [token for token in tokens if token != "*"]
+        if literal:
+            self.keys.add(literal[-1])
+        self.rules.append(rule)
+
+    def match(self, path, value):
+        """All (concrete path, rule, value) hits for a patch at path.
+
+        A patch on a parent (e.g. a whole fader) also reaches the rules below
+        it, by following the trie into the patched value.
+        """
+        frontier = [self.root]
+        for token in ([] if path == "" else path[1:].split("/")):
+            next_frontier = []
+            for node in frontier:
+                children = node["children"]
+                if token in children:
+                    next_frontier.append(children[token])
+                if "*" in children:
+                    next_frontier.append(children["*"])
+            if not next_frontier:
+                return []
+            frontier = next_frontier
+
+        hits = []
+        for node in frontier:
+            self._collect(node, path, value, hits)
+        return hits
+
+    def _collect(self, node, path, value, hits):
+        for rule in node["rules"]:
+            hits.append((path, rule, value))
+        if not node["children"] or not isinstance(value, dict):
+            return
+        for token, child in node["children"].items():
+            if token == "*":
+                for key, item in value.items():
+                    self._collect(child, f"{path}/{key}", item, hits)
+            elif token in value:
+                self._collect(child, f"{path}/{token}", value[token], hits)
+
+    @staticmethod
+    def map_value(rule, value):
+        """Rule result for a value: True/False, or None to ignore it"""
+        if "set" in rule:
+            return bool(rule["set"])
+        if "values" in rule:
+            values = rule["values"]
+            key = value if isinstance(value, str) else json.dumps(value)
+            if key in values:
+                return bool(values[key])
+            return bool(values["*"]) if "*" in values else None
+        return value not in (None, False, 0, "", "Unmuted")
+
+    def evaluate(self, path, value, initial=False):
+        """Voice settings wanted after a change at path ({} if none).
+
+        With initial=True (a fresh GetStatus) only state rules apply,
+        "set" triggers only fire on real changes.
+        """
+        settings = {}
+        for concrete, rule, item in self.match(path, value):
+            previous = self.last.get(concrete, _NO_VALUE)
+            self.last[concrete] = item
+            if item == previous and not initial:
+                continue
+            if initial and "set" in rule:
+                continue
+            result = self.map_value(rule, item)
+            if result is not None:
+                settings[rule["action"]] = result
+        return settings
+
+# Rules from config.json, built by build_rule_engine()
+rule_engine = RuleEngine()
 
-    last_cough_state = None
-    discord_connected = False
+def build_rule_engine():
+    """Compile config.json rules, skipping (and reporting) invalid ones"""
+    global rule_engine, PATCH_FILTER
+
+    rule_engine = RuleEngine()
+    for rule in config["rules"]:
+        try:
+            rule_engine.add(rule)
+        except (ValueError, AttributeError) as e:
+            log.warning(f"Ignoring rule {rule!r}: {e}")
+
+    # Frames touching a rule path must get past the pre-filter
+    PATCH_FILTER = BASE_PATCH_FILTER + tuple(sorted(rule_engine.keys))
+    if rule_engine.rules:
+        log.info(f"Loaded {len(rule_engine.rules)} rule(s) from {CONFIG_FILE}")
+    return rule_engine
+
+# === GoXLR websocket ===
+
+class GoXLRError(Exception):
+    """GoXLR Utility answered a request with an Error"""
+
+class GoXLRConnection:
+    """Request/response multiplexer over the GoXLR Utility websocket.
+
+    request() gives every request its own id and waits (with a timeout) for
+    the reply with that id, so any number can be in flight at once. run()
+    reads the socket: replies resolve their request, Patch frames go to the
+    subscribers, undecoded and in order.
+    """
+
+    def __init__(self, ws, timeout=GOXLR_REQUEST_TIMEOUT):
+        self.ws = ws
+        self.timeout = timeout
+        self.subscribers = []  # callables (message, received)
+        self._pending = {}     # request id → (future, on_reply)
+        self._next_id = 0
+        self._early = []       # Patch frames read before the first subscriber
+        self.stats = {"replies": 0, "late_replies": 0, "patches": 0, "unrouted": 0}
+
+    def subscribe(self, callback):
+        """Call callback(message, received) for each Patch frame from now on.
+
+        Patches read before the first subscriber and before the latest reply
+        are dropped: that reply (the initial GetStatus) already includes
+        their changes. Those read after it are replayed here first, so a
+        press right after GetStatus isn't lost.
+        """
+        if not self.subscribers:
+            early, self._early = self._early, []
+            for frame in early:
+                callback(*frame)
+        self.subscribers.append(callback)
+
+    async def request(self, data, timeout=None, on_reply=None):
+        """Send one request, return the data of its reply.
+
+        on_reply(data) runs as soon as the reply is read, before any frame
+        after it, e.g. to reseed state that later patches build on.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = (future, on_reply)
+        health_stats["goxlr_requests"] += 1
+        try:
+            await self.ws.send(json.dumps({"id": request_id, "data": data}))
+            reply = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            health_stats["goxlr_timeouts"] += 1
+            raise asyncio.TimeoutError(f"no reply to {data!r} within {timeout or self.timeout}s") from None
+        finally:
+            del self._pending[request_id]
+
+        if isinstance(reply, dict) and "Error" in reply:
+            raise GoXLRError(reply["Error"])
+        return reply
+
+    async def run(self):
+        """Route frames until the socket closes, then fail whatever is still waiting"""
+        try:
+            while True:
+                message = await self.ws.recv()
+                received = time.monotonic()
+                sync_stats["frames"] += 1
+
+                # Patches are most of the traffic: spot them without decoding
+                if '{"Patch"' in message[:64]:
+                    self.stats["patches"] += 1
+                    if not self.subscribers:
+                        self._early.append((message, received))
+                    for callback in self.subscribers:
+                        callback(message, received)
+                    continue
+
+                frame = json_loads(message)
+                future, on_reply = self._pending.get(frame.get("id"), (None, None))
+                if future is None or future.done():
+                    # Its request timed out (or GoXLR Utility sent something new)
+                    self.stats["late_replies"] += 1
+                    if isinstance(frame.get("data"), dict) and "Error" in frame["data"]:
+                        log.warning(f"GoXLR Utility error: {frame['data']['Error']}")
+                    continue
+                self.stats["replies"] += 1
+                if not self.subscribers:
+                    # Already part of the state this reply carries
+                    self.stats["unrouted"] += len(self._early)
+                    self._early.clear()
+                if on_reply is not None:
+                    try:
+                        on_reply(frame.get("data"))
+                    except Exception as e:
+                        future.set_exception(e)
+                        continue
+                future.set_result(frame.get("data"))
+        except BaseException as e:
+            for future, _ in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"GoXLR connection closed: {e}"))
+            raise
+
+async def goxlr_supervisor(desired):
+    """Keep the GoXLR websocket up and feed its changes to the Discord writer"""
+    global goxlr_conn
+
+    mixers = goxlr_mixers
+    backoff = Backoff(GOXLR_RETRY_DELAY)
+
+    def on_patch(message, received):
+        """Handle one Patch frame (runs inside the connection's reader)"""
+        relevant = frame_is_relevant(message)
+        if not relevant and not config["state_mirror"]:
+            sync_stats["frames_skipped"] += 1
+            return
+
+        patches = json_loads(message)["data"]["Patch"]
+        parsed = time.monotonic()
+        changes = []  # settings for Discord, handed off once the scan is done
+
+        if relevant:
+            for patch in patches:
+                serial, field = parse_patch_path(patch.get("path", ""))
+
+                if serial and field == "":
+                    # Whole mixer added or removed (hot-plug)
+                    op = patch.get("op")
+                    if op in ("add", "replace") and isinstance(patch.get("value"), dict):
+                        mixers.add_mixer(serial, patch["value"])
+                        log.info(f"Mixer connected [{serial}]: {mixers.cough[serial]}")
+                    elif op == "remove":
+                        mixers.remove_mixer(serial)
+                        log.info(f"Mixer disconnected [{serial}]")
+                    else:
+                        continue
+
+                    goxlr_muted = mixers.discord_muted()
+                    if mixers.drives_discord(serial) and goxlr_muted is not None:
+                        changes.append({"mute": goxlr_muted})
+
+                elif serial and field == "cough_button/state":
+                    new_state = patch.get("value")
+                    old_state = mixers.cough.get(serial)
+                    if new_state is not None and new_state != old_state:
+                        mixers.update(serial, new_state)
+                        log.debug("Cough [%s]: %s → %s", serial, old_state, new_state)
+
+                        started = echo_guard.consume_goxlr(serial, new_state)
+                        if started is not None:
+                            # We set this from Discord, they agree now
+                            record_span("discord_to_goxlr", started, received)
+                        elif mixers.drives_discord(serial):
+                            changes.append({"mute": mixers.discord_muted()})
+
+                elif serial and field == "cough_button/mute_type":
+                    mixers.mute_type[serial] = patch.get("value")
+
+                if rule_engine.rules and patch.get("op") != "remove":
+                    settings = rule_engine.evaluate(patch.get("path", ""), patch.get("value"))
+                    if settings:
+                        changes.append(settings)
+
+        # Only trace frames that changed something for Discord, the rest is noise
+        if changes:
+            scanned = record_span("match", parsed)
+            record_span("parse", received, parsed)
+            # Hand off to the Discord writer (never blocks)
+            for settings in changes:
+                desired.put(settings, received)
+            record_span("handoff", scanned)
+
+        # Off the traced path: nothing above reads the mirror
+        if config["state_mirror"] and not goxlr_state.apply(patches):
+            start_mirror_reload()
+
+    mirror_reload = None
+
+    def start_mirror_reload():
+        """Reload the mirror after a bad patch, once at a time, without pausing patches"""
+        nonlocal mirror_reload
+        if mirror_reload is None or mirror_reload.done():
+            mirror_reload = asyncio.create_task(reload_mirror(goxlr_conn))
+
+    async def reload_mirror(conn):
+        try:
+            # Reseed as the reply is read, so the patches after it apply on top
+            await conn.request("GetStatus", on_reply=lambda data: reload_state_mirror(data["Status"]))
+        except Exception as e:
+            log.warning(f"State mirror reload failed: {str(e) or type(e).__name__}")
 
     while app_running:
-        # Wait for Discord if not connected
-        if not discord_connected:
-            print()
-            print("Connecting to Discord RPC...")
-            discord_connected = await connect_discord()
-            
-            if not discord_connected:
-                print(f"Discord not available. Retrying in {DISCORD_RETRY_DELAY}s...")
-                await asyncio.sleep(DISCORD_RETRY_DELAY)
-                continue
-        
-        # Connect to GoXLR
-        print()
-        print("Connecting to GoXLR Utility...")
-        status_text = "Connecting to GoXLR..."
+        log.info("Connecting to GoXLR Utility...")
+        app_state.update(status="Connecting to GoXLR...")
+        reader = None
 
         try:
             async with websockets.connect(GOXLR_WEBSOCKET_URL) as ws:
-                print("Connected to GoXLR Utility")
-                status_text = "Connected to GoXLR & Discord"
-                
-                # Get initial state
-                request = {"id": 1, "data": "GetStatus"}
-                await ws.send(json.dumps(request))
+                log.info("Connected to GoXLR Utility")
+                if discord_ready.is_set():
+                    app_state.update(status="Connected to GoXLR & Discord")
+                else:
+                    app_state.update(status="Connected to GoXLR, waiting for Discord...")
+                conn = goxlr_conn = GoXLRConnection(ws)
+                reader = asyncio.create_task(conn.run())
+                # Its error ends "await reader" below, or is moot if a request failed first
+                reader.add_done_callback(lambda task: task.cancelled() or task.exception())
+                backoff.reset()
+                health_stats["goxlr_reconnects"] += 1
+
+                # Get initial state (patches before the reply are already in it,
+                # the ones after it wait for subscribe below)
+                reply = await conn.request("GetStatus")
                 
-                response = await ws.recv()
-                result = json.loads(response)
-                
-                # Find initial Cough state
-                if "data" in result and "Status" in result["data"]:
-                    status = result["data"]["Status"]
+                # Find initial Cough state of every mixer
+                if isinstance(reply, dict) and "Status" in reply:
+                    status = reply["Status"]
+                    if config["state_mirror"]:
+                        # After a daemon restart, the mirror still holds the old state
+                        missed = [path for path in reload_state_mirror(status)
+                                  if any(key in path for key in PATCH_FILTER)]
+                        if missed:
+                            sync_stats["missed"] += len(missed)
+                            log.info(f"Catching up on {len(missed)} change(s) made while "
+                                     f"GoXLR Utility was away: {', '.join(missed[:3])}")
+
                     if "mixers" in status:
-                        for serial, mixer in status["mixers"].items():
-                            if "cough_button" in mixer:
-                                last_cough_state = mixer["cough_button"].get("state")
-                                print(f"Initial Cough state: {last_cough_state}")
-
-                                # Sync initial state (default to unmuted if unknown)
-                                if last_cough_state:
-                                    goxlr_muted = (last_cough_state != "Unmuted")
-                                else:
-                                    goxlr_muted = False  # Default to unmuted
-
-                                success = await sync_mute_state(goxlr_muted)
-                                if not success:
-                                    discord_connected = False
-                                break
-                
-                print()
-                print("=" * 50)
-                print("  LISTENING - Press Cough to mute Discord")
-                print("=" * 50)
-                print()
-                
-                # Listen for real-time patches
-                while True:
-                    message = await ws.recv()
-                    data = json.loads(message)
-                    
-                    if "data" in data and "Patch" in data["data"]:
-                        patches = data["data"]["Patch"]
-                        for patch in patches:
-                            path = patch.get("path", "")
-
-                            if "cough_button/state" in path:
-                                new_state = patch.get("value")
-                                if new_state is not None and new_state != last_cough_state:
-                                    import time
-                                    event_time = time.time()
-                                    print(f"Cough: {last_cough_state} → {new_state}")
-
-                                    # Sync with Discord
-                                    goxlr_muted = (new_state != "Unmuted")
-
-                                    # Start sync immediately (non-blocking for UI feedback)
-                                    success = await sync_mute_state(goxlr_muted)
-
-                                    total_time = time.time() - event_time
-                                    print(f"  Total time from event: {total_time:.2f}s")
-
-                                    if not success:
-                                        # Discord disconnected, reconnect
-                                        discord_connected = False
-                                        print("Discord disconnected. Reconnecting...")
-
-                                        # Close properly
-                                        try:
-                                            discord_rpc.close()
-                                        except:
-                                            pass
-
-                                        # Wait and reconnect
-                                        await asyncio.sleep(2)
-                                        discord_connected = await connect_discord()
-
-                                        if discord_connected:
-                                            # Resync state
-                                            await sync_mute_state(goxlr_muted)
-
-                                    last_cough_state = new_state
+                        mixers.load_status(status["mixers"])
+                        for serial, state in mixers.cough.items():
+                            role = "drives Discord" if mixers.drives_discord(serial) else "ignored"
+                            log.info(f"Initial Cough state [{serial}]: {state} ({role})")
+
+                        # Sync initial state (unknown states count as unmuted)
+                        goxlr_muted = mixers.discord_muted()
+                        if goxlr_muted is not None:
+                            desired.put({"mute": goxlr_muted})
+                        elif mixers.cough:
+                            log.warning("No mixer matches 'discord_mixers' in config.json")
+
+                    if rule_engine.rules:
+                        settings = rule_engine.evaluate("", status, initial=True)
+                        if settings:
+                            desired.put(settings)
+
+                # Real-time patches from here on
+                conn.subscribe(on_patch)
+                goxlr_ready.set()
+                mark_startup("goxlr_connected")
+                note_ready()
+                update_tray_icon()
+
+                log.info("=" * 50)
+                log.info("  LISTENING - Press Cough to mute Discord")
+                log.info("=" * 50)
+
+                # The reader only ends when the connection does
+                await reader
                                     
-        except asyncio.CancelledError:
-            print("Shutdown requested.")
-            break
         except Exception as e:
             error_msg = str(e)
-            
+            delay = backoff.next()
+
             # Differentiate error types
             if "ConnectionRefusedError" in error_msg or "Connect call failed" in error_msg or "connection" in error_msg.lower():
-                print(f"GoXLR Utility not available. Retrying in {GOXLR_RETRY_DELAY}s...")
+                log.info(f"GoXLR Utility not available. Retrying in {delay:.1f}s...")
             else:
-                print(f"GoXLR connection lost: {e}")
-                print(f"Reconnecting in {GOXLR_RETRY_DELAY}s...")
-            
-            await asyncio.sleep(GOXLR_RETRY_DELAY)
+                log.warning(f"GoXLR connection lost: {str(e) or type(e).__name__}")
+                log.info(f"Reconnecting in {delay:.1f}s...")
+        finally:
+            for task in (reader, mirror_reload):
+                if task is not None and not task.done():
+                    task.cancel()
+            goxlr_conn = None
+            goxlr_ready.clear()
+            update_tray_icon()
+
+        # The listen loop only ends with an error, so delay is always set here
+        await asyncio.sleep(delay)
+
+async def main_loop():
+    """Run the Discord and GoXLR supervisors side by side until cancelled"""
+    global goxlr_mixers, desired_voice
+
+    goxlr_mixers = MixerTracker(config["mixer_policy"], config["discord_mixers"])
+    health_stats["started"] = time.monotonic()
+
+    # GoXLR changes wait here for Discord, across reconnects of either side
+    desired_voice = DesiredState()
+    tasks = [
+        # One worker per output sink, a slow one only holds up itself
+        *(asyncio.create_task(sink_worker(sink)) for sink in output_sinks),
+        # Keep the saved token fresh so reconnects never wait on OAuth
+        asyncio.create_task(token_refresh_loop()),
+        # Each side connects and retries on its own, neither waits for the other
+        asyncio.create_task(discord_health_loop()),
+        # Discord writes run in a task per client (see add_discord_link) so
+        # a slow Discord never stops us from reading the websocket
+        asyncio.create_task(goxlr_supervisor(desired_voice)),
+    ]
+
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        log.info("Shutdown requested.")
+    finally:
+        # asyncio.wait_for before Python 3.12 can swallow a cancel that races
+        # with its result, so keep cancelling until every task has stopped
+        pending = set(tasks)
+        while pending:
+            for task in pending:
+                task.cancel()
+            _, pending = await asyncio.wait(pending, timeout=0.5)
+        close_discord()
+        await close_sinks()
+
+async def profile_main_loop():
+    """Run main_loop until the first sync, for --profile-startup"""
+    task = asyncio.create_task(main_loop())
+    try:
+        await asyncio.wait_for(first_sync_done.wait(), 60)
+    except asyncio.TimeoutError:
+        log.warning("No sync within 60s, is GoXLR Utility and Discord running?")
+        report_startup()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+# === Service mode: signals and status ===
+
+running_app = None  # (event loop, task) while run_app() runs, for request_shutdown()
+
+def request_shutdown():
+    """Stop the app cleanly from any thread, False if it isn't running yet"""
+    if running_app is None:
+        return False
+    loop, task = running_app
+    loop.call_soon_threadsafe(task.cancel)
+    return True
+
+def process_rss_kb():
+    """Resident memory of this process in KiB, None if the OS won't say"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class MemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                        "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                        "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+            counters = MemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(
+                ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize // 1024
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except Exception:
+        pass
+    return None
+
+def status_report():
+    """Current state, for the status socket and SIGUSR1"""
+    snapshot = app_state.snapshot()
+    return {
+        "muted": snapshot.muted,
+        "status": snapshot.status,
+        "state": snapshot.tray,
+        "discord_connected": discord_ready.is_set(),
+        "goxlr_connected": goxlr_ready.is_set(),
+        "mode": "headless" if HEADLESS else "tray",
+        "rss_kb": process_rss_kb(),
+        "gui_loaded": any(module in sys.modules for module in ("pystray", "PIL")),
+        "sync": dict(sync_stats),
+        "health": dict(health_stats),
+        "discord_clients": {link.name: link.report() for link in discord_links.values()},
+        "sinks": {sink.name: sink.report() for sink in output_sinks},
+        "stages": latency_report(),
+        "log": log_buffer.tail(20),
+    }
+
+def log_status():
+    """Log a one-line status summary (SIGUSR1)"""
+    report = status_report()
+    log.info(f"Status: {report['state']} - {report['status']} "
+             f"(Discord {'up' if report['discord_connected'] else 'down'}, "
+             f"GoXLR {'up' if report['goxlr_connected'] else 'down'}, RSS {report['rss_kb']} KiB)")
+    for line in format_latency(("e2e", "converge")):
+        log.info(f"  {line}")
+
+async def serve_status(path):
+    """Answer each connection on a unix socket with the status as one JSON line"""
+    async def handle(reader, writer):
+        try:
+            writer.write(json.dumps(status_report()).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client left before reading its reply
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.remove(path)  # left over from a crash
+    server = await asyncio.start_unix_server(handle, path)
+    os.chmod(path, 0o600)
+    log.info(f"Status socket: {path}")
+    return server
+
+def cli_option(name):
+    """Value following a --name option on the command line, or None"""
+    if name in sys.argv:
+        index = sys.argv.index(name) + 1
+        if index < len(sys.argv):
+            return sys.argv[index]
+    return None
+
+async def run_app(coro):
+    """Run the app until it ends or is asked to stop (signal, tray Quit)"""
+    global running_app
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(coro)
+    running_app = (loop, task)
+
+    # SIGTERM (systemctl stop) and Ctrl+C stop cleanly, SIGUSR1 prints the status
+    for name in ("SIGTERM", "SIGINT", "SIGHUP"):
+        try:
+            loop.add_signal_handler(getattr(signal, name), task.cancel)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+    try:
+        loop.add_signal_handler(signal.SIGUSR1, log_status)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass
+
+    status_path = cli_option("--status-socket")
+    server = await serve_status(status_path) if status_path else None
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass  # cancelled before main_loop got to run
+    finally:
+        running_app = None
+        if server:
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(status_path):
+                os.remove(status_path)
 
 def main():
     global app_running
 
-    print("=" * 50)
-    print("   GoXLR Discord Sync")
-    print("=" * 50)
-    print()
+    setup_logging()
+    log.info("=" * 50)
+    log.info("   GoXLR Discord Sync")
+    log.info("=" * 50)
 
     # Initial setup
     if not first_time_setup():
         sys.exit(1)
-
-    # Setup system tray icon
-    print("Starting system tray icon...")
-    setup_tray_icon()
+    load_config()
+    apply_log_config()
+    build_rule_engine()
+    build_sinks()
+    mark_startup("config")
+
+    if HEADLESS:
+        log.info("Running headless (no tray icon)")
+    else:
+        # Setup system tray icon
+        log.info("Starting system tray icon...")
+        setup_tray_icon()
 
     try:
-        asyncio.run(main_loop())
+        asyncio.run(run_app(profile_main_loop() if PROFILE_STARTUP else main_loop()))
     except KeyboardInterrupt:
-        print("\nScript stopped.")
+        log.info("Script stopped.")
         app_running = False
     finally:
+        if token_client:
+            token_client.close()
+
         # Clean up tray icon
         if tray_icon:
             tray_icon.stop()